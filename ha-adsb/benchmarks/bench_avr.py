@@ -0,0 +1,82 @@
+"""Benchmark AVR frame ingestion - reports decoded frames per second.
+
+Run from the add-on directory:
+
+    python3 benchmarks/bench_avr.py --aircraft 200 --frames 200000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "rootfs" / "app"))
+
+from feeds import AVRFeed  # noqa: E402
+from modes import crc24  # noqa: E402
+
+# ME fields of real extended squitters: identification, even/odd airborne
+# position and airborne velocity
+SAMPLE_ME = [
+    bytes.fromhex("202CC371C32CE0"),
+    bytes.fromhex("58C382D690C8AC"),
+    bytes.fromhex("58C386435CC412"),
+    bytes.fromhex("99440994083817"),
+]
+
+
+def make_frames(aircraft: int, count: int) -> bytes:
+    """Build an AVR stream of valid DF17 frames spread over many aircraft."""
+    lines = []
+    for i in range(count):
+        icao = 0x400000 + (i % aircraft)
+        body = bytes([0x8D]) + icao.to_bytes(3, "big") + SAMPLE_ME[i % len(SAMPLE_ME)]
+        frame = body + crc24(body).to_bytes(3, "big")
+        lines.append(f"*{frame.hex().upper()};\r\n")
+    return "".join(lines).encode("ascii")
+
+
+def run(aircraft: int, count: int, chunk_size: int) -> dict:
+    """Push a synthetic stream through AVRFeed in socket-sized chunks."""
+    stream = make_frames(aircraft, count)
+    feed = AVRFeed("bench", 30002)
+
+    started = time.perf_counter()
+    offset = 0
+    while offset < len(stream):
+        view = feed._get_buffer()
+        size = min(len(view), chunk_size, len(stream) - offset)
+        view[:size] = stream[offset:offset + size]
+        feed._buffer_updated(size)
+        offset += size
+    elapsed = time.perf_counter() - started
+
+    return {
+        "frames": count,
+        "accepted": feed.table.messages,
+        "aircraft": len(feed.table),
+        "crc_errors": feed.decoder.crc_errors,
+        "seconds": round(elapsed, 3),
+        "frames_per_second": round(count / elapsed),
+    }
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--aircraft", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    result = run(args.aircraft, args.frames, args.chunk_size)
+    print(f"AVR: {result['frames_per_second']} frames/s "
+          f"({result['accepted']}/{result['frames']} accepted, {result['seconds']}s)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Benchmark the receiver-to-Home-Assistant pipeline - aircraft.json in, entity states out.
+
+Runs ADSBScanner.get_aircraft_data and HAIntegration.update_aircraft_data
+against local aiohttp stand-ins for the receiver and the supervisor
+/core/api/states endpoint, or with --output mqtt, MQTTIntegration against
+the fake broker. Peak RSS is that of the whole run so far, so
+sizes are best listed smallest first. Run from the add-on directory:
+
+    python3 benchmarks/bench_pipeline.py --sizes 10 100 1000 5000 --json results.json
+    python3 benchmarks/bench_pipeline.py --output mqtt
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+ADDON_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ADDON_DIR / "rootfs" / "app"))
+
+from aircraft_table import AircraftTable  # noqa: E402
+from fake_broker import FakeBroker  # noqa: E402
+from ha_integration import HAIntegration  # noqa: E402
+from mqtt_integration import MQTTIntegration, MQTTPublisher  # noqa: E402
+from receiver import loads  # noqa: E402
+from scanner import ADSBScanner  # noqa: E402
+
+SNAPSHOTS = 20  # distinct aircraft.json bodies served in rotation
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+
+def make_snapshots(aircraft: int, count: int, seed: int = 1) -> list:
+    """Build aircraft.json bodies for a sky of moving aircraft."""
+    rng = random.Random(seed)
+    fleet = [
+        {
+            "hex": f"{0x400000 + i:06x}",
+            "flight": f"BAW{i:<5}",
+            "lat": rng.uniform(50, 53),
+            "lon": rng.uniform(-2, 2),
+            "alt_baro": rng.randrange(1000, 40000, 25),
+            "gs": rng.uniform(150, 480),
+            "track": rng.uniform(0, 360),
+            "baro_rate": rng.randrange(-2000, 2000, 64),
+            "squawk": f"{rng.randrange(0o10000):04o}",
+            "category": "A3",
+            "nic": 8,
+            "rssi": rng.uniform(-30, -3),
+        }
+        for i in range(aircraft)
+    ]
+    now = time.time()
+    messages = 1000000
+    bodies = []
+    for step in range(count):
+        now += 1
+        messages += aircraft * 5
+        rows = []
+        for i, ac in enumerate(fleet):
+            ac["lat"] += 0.001
+            ac["lon"] += 0.001
+            row = dict(ac, seen=round(rng.random(), 1), messages=100 + step * 5)
+            if (i + step) % 4:
+                row["seen_pos"] = round(rng.random() * 2, 1)
+            else:
+                # Not every aircraft has a fresh position every second
+                del row["lat"], row["lon"]
+            rows.append(row)
+        bodies.append(json.dumps({"now": now, "messages": messages, "aircraft": rows}).encode())
+    return bodies
+
+
+class Receiver:
+    """aircraft.json stand-in serving pre-rendered snapshots in rotation."""
+
+    def __init__(self, bodies: list):
+        """Initialize receiver."""
+        self.bodies = bodies
+        self.requests = 0
+
+    async def aircraft(self, request: web.Request) -> web.Response:
+        """Serve the next snapshot."""
+        body = self.bodies[self.requests % len(self.bodies)]
+        self.requests += 1
+        return web.Response(body=body, content_type="application/json")
+
+
+class HomeAssistant:
+    """Supervisor /core/api/states stand-in that only counts requests."""
+
+    def __init__(self):
+        """Initialize stand-in."""
+        self.requests = 0
+
+    async def state(self, request: web.Request) -> web.Response:
+        """Accept a state update."""
+        await request.read()
+        self.requests += 1
+        return web.json_response({}, status=200)
+
+
+async def start_server(routes, port: int = 0) -> tuple:
+    """Start an aiohttp app on loopback, returning the runner and port."""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Get a percentile of a list of values (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> float:
+    """Get the process peak resident set size in MB."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+async def run(size: int, cycles: int, output: str = "rest") -> dict:
+    """Benchmark one sky size."""
+    bodies = make_snapshots(size, SNAPSHOTS)
+
+    # Decode and ingest cost without any I/O
+    parse_ms, ingest_ms = [], []
+    table = AircraftTable()
+    for body in bodies:
+        started = time.perf_counter()
+        data = loads(body)
+        parsed = time.perf_counter()
+        table.ingest(data)
+        parse_ms.append((parsed - started) * 1000)
+        ingest_ms.append((time.perf_counter() - parsed) * 1000)
+
+    receiver = Receiver(bodies)
+    hass = HomeAssistant()
+    receiver_runner, receiver_port = await start_server(
+        [web.get("/data/aircraft.json", receiver.aircraft)]
+    )
+    hass_runner, hass_port = await start_server(
+        [web.post("/core/api/states/{entity_id}", hass.state)]
+    )
+
+    scanner = ADSBScanner()
+    scanner.detected_device = {
+        "host": "127.0.0.1",
+        "port": receiver_port,
+        "type": "benchmark",
+        "endpoint": "/data/aircraft.json",
+        "transport": "http",
+    }
+    broker = None
+    if output == "mqtt":
+        broker = FakeBroker(port=0)
+        ha = MQTTIntegration(MQTTPublisher("127.0.0.1", await broker.start()))
+        await ha.create_entities()
+        while not ha.publisher.connected:
+            await asyncio.sleep(0.01)
+        await ha.publisher.flush()
+    else:
+        ha = HAIntegration("benchmark", ha_url=f"http://127.0.0.1:{hass_port}/core")
+
+    latency_ms = []
+    try:
+        for _ in range(cycles):
+            started = time.perf_counter()
+            data = await scanner.get_aircraft_data()
+            await ha.update_aircraft_data(data, scanner.aircraft.summary())
+            await ha.publisher.flush()
+            latency_ms.append((time.perf_counter() - started) * 1000)
+        tracked = scanner.aircraft.summary()["total"]
+    finally:
+        await ha.close()
+        await scanner.close()
+        await receiver_runner.cleanup()
+        await hass_runner.cleanup()
+        if broker:
+            await broker.stop()
+
+    result = {
+        "aircraft": size,
+        "body_bytes": round(statistics.mean(len(body) for body in bodies)),
+        "parse_ms": round(statistics.median(parse_ms), 3),
+        "ingest_ms": round(statistics.median(ingest_ms), 3),
+        "latency_ms": {
+            "p50": round(percentile(latency_ms, 50), 3),
+            "p90": round(percentile(latency_ms, 90), 3),
+            "p99": round(percentile(latency_ms, 99), 3),
+            "max": round(max(latency_ms), 3),
+        },
+        "cycles": cycles,
+        "tracked_aircraft": tracked,
+        "receiver_requests": receiver.requests,
+        "ha_requests": hass.requests,
+        "ha_skipped": ha.skipped_updates,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if broker:
+        result["mqtt_messages"] = broker.messages
+        result["mqtt_payload_bytes"] = broker.payload_bytes
+        result["mqtt_retained"] = len(broker.retained)
+    return result
+
+
+def addon_version() -> str:
+    """Read the add-on version from config.yaml."""
+    for line in (ADDON_DIR / "config.yaml").read_text().splitlines():
+        if line.startswith("version:"):
+            return line.split(":", 1)[1].strip().strip('"')
+    return "unknown"
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--output", choices=("rest", "mqtt"), default="rest")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        result = asyncio.run(run(size, args.cycles, args.output))
+        latency = result["latency_ms"]
+        if args.output == "mqtt":
+            published = f"{result['mqtt_messages']} MQTT messages ({result['mqtt_payload_bytes']} bytes)"
+        else:
+            published = f"{result['ha_requests']} HA requests"
+        print(
+            f"{size:>5} aircraft: parse {result['parse_ms']:.2f} ms, "
+            f"ingest {result['ingest_ms']:.2f} ms, "
+            f"end-to-end p50 {latency['p50']:.2f} / p90 {latency['p90']:.2f} / "
+            f"p99 {latency['p99']:.2f} ms, "
+            f"{result['receiver_requests']} receiver requests / {published}, "
+            f"peak RSS {result['peak_rss_mb']} MB"
+        )
+        results.append(result)
+        if result["tracked_aircraft"] != size:
+            # The sensors read the scanner's table, so the run is meaningless without it
+            sys.exit(f"Scanner table holds {result['tracked_aircraft']} of {size} aircraft")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "benchmark": "pipeline",
+            "output": args.output,
+            "version": addon_version(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": int(time.time()),
+            "results": results,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
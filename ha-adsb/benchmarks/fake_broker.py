@@ -0,0 +1,196 @@
+"""Fake Broker - Minimal MQTT 3.1.1 broker stand-in that counts what it receives.
+
+Accepts connections, QoS 0/1 publishes, subscriptions (with + and #
+wildcards) and keeps retained messages; enough to exercise the add-on's
+MQTT output without mosquitto. Run from the add-on directory:
+
+    python3 benchmarks/fake_broker.py --port 1883
+"""
+import argparse
+import asyncio
+import struct
+from typing import Dict, List, Optional, Set, Tuple
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """Check a topic against a subscription filter."""
+    pattern_levels = pattern.split("/")
+    topic_levels = topic.split("/")
+    for i, level in enumerate(pattern_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels) or (level != "+" and level != topic_levels[i]):
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+def encode_packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    """Frame a packet with its fixed header."""
+    length = len(body)
+    header = bytearray((packet_type << 4 | flags,))
+    while True:
+        byte, length = length % 128, length // 128
+        header.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(header) + body
+
+
+def _string(data: bytes, offset: int) -> Tuple[str, int]:
+    """Read a length-prefixed UTF-8 string."""
+    (length,) = struct.unpack_from("!H", data, offset)
+    start = offset + 2
+    return data[start:start + length].decode(), start + length
+
+
+class FakeBroker:
+    """In-process MQTT broker for tests and benchmarks."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1883):
+        """Initialize broker."""
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.messages = 0
+        self.payload_bytes = 0
+        self.topics: Dict[str, int] = {}
+        self.retained: Dict[str, bytes] = {}
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._subscribers: List[Tuple[str, asyncio.StreamWriter]] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        """Start listening, returning the bound port."""
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Stop listening and drop every client."""
+        for writer in list(self._clients):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+        """Read one packet, returning its type, flags and body."""
+        first = (await reader.readexactly(1))[0]
+        length, shift = 0, 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        return first >> 4, first & 0x0F, await reader.readexactly(length)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one client connection."""
+        self.connections += 1
+        self._clients.add(writer)
+        try:
+            while True:
+                packet_type, flags, body = await self._read_packet(reader)
+                if packet_type == CONNECT:
+                    writer.write(encode_packet(CONNACK, 0, b"\x00\x00"))
+                elif packet_type == PUBLISH:
+                    self._publish(flags, body, writer)
+                elif packet_type == SUBSCRIBE:
+                    self._subscribe(body, writer)
+                elif packet_type == UNSUBSCRIBE:
+                    writer.write(encode_packet(UNSUBACK, 0, body[:2]))
+                elif packet_type == PINGREQ:
+                    writer.write(encode_packet(PINGRESP, 0, b""))
+                elif packet_type == DISCONNECT:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            self._subscribers = [(p, w) for p, w in self._subscribers if w is not writer]
+            writer.close()
+
+    def _publish(self, flags: int, body: bytes, writer: asyncio.StreamWriter):
+        """Record a publish and forward it to matching subscribers."""
+        topic, offset = _string(body, 0)
+        qos = (flags >> 1) & 0x3
+        if qos:
+            packet_id = body[offset:offset + 2]
+            offset += 2
+            writer.write(encode_packet(PUBACK, 0, packet_id))
+        payload = body[offset:]
+
+        self.messages += 1
+        self.payload_bytes += len(payload)
+        self.topics[topic] = self.topics.get(topic, 0) + 1
+        if flags & 0x1:
+            if payload:
+                self.retained[topic] = payload
+            else:
+                self.retained.pop(topic, None)
+
+        packet = encode_packet(PUBLISH, 0, struct.pack("!H", len(topic)) + topic.encode() + payload)
+        for pattern, subscriber in self._subscribers:
+            if topic_matches(pattern, topic):
+                subscriber.write(packet)
+
+    def _subscribe(self, body: bytes, writer: asyncio.StreamWriter):
+        """Register subscriptions and send matching retained messages."""
+        packet_id, offset = body[:2], 2
+        granted = bytearray()
+        while offset < len(body):
+            pattern, offset = _string(body, offset)
+            offset += 1  # requested QoS, always granted 0
+            self._subscribers.append((pattern, writer))
+            granted.append(0)
+            for topic, payload in self.retained.items():
+                if topic_matches(pattern, topic):
+                    writer.write(encode_packet(
+                        PUBLISH, 0x1, struct.pack("!H", len(topic)) + topic.encode() + payload
+                    ))
+        writer.write(encode_packet(SUBACK, 0, packet_id + bytes(granted)))
+
+
+async def serve(args):
+    """Run the broker, printing counters every few seconds."""
+    broker = FakeBroker(args.host, args.port)
+    await broker.start()
+    print(f"Listening on {args.host}:{broker.port}")
+    try:
+        while True:
+            await asyncio.sleep(args.interval)
+            print(
+                f"{broker.connections} connections, {broker.messages} messages, "
+                f"{broker.payload_bytes} payload bytes, {len(broker.retained)} retained"
+            )
+    finally:
+        await broker.stop()
+
+
+def main():
+    """Run the broker."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--interval", type=float, default=10, help="Seconds between counter reports")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
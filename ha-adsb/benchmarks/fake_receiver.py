@@ -0,0 +1,680 @@
+"""Fake Receiver - Simulated ADS-B receivers for load and discovery tests.
+
+Serves aircraft.json/receiver.json over HTTP and streams Beast (30005),
+SBS (30003) and AVR (30002) from a simulated sky, on as many loopback
+addresses as asked for. Linux routes all of 127.0.0.0/8 to lo, so no
+interface setup is needed to give each receiver its own address. Binding
+port 80 needs root; the default HTTP port is 8080. Run from the add-on
+directory:
+
+    python3 benchmarks/fake_receiver.py --receivers 1 --aircraft 300
+    python3 benchmarks/fake_receiver.py --receivers 40 --base 127.0.1.1 \\
+        --profiles full,http,beast,sbs,avr,decoy,silent --scan
+    python3 benchmarks/fake_receiver.py --receivers 4 --profiles http,beast,sbs,avr --poll 3
+    python3 benchmarks/fake_receiver.py --receivers 8 --profiles full,decoy,silent --mdns
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import math
+import random
+import socket
+import struct
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from aiohttp import web
+
+ADDON_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ADDON_DIR / "rootfs" / "app"))
+
+from feeds import BEAST_ESCAPE, BEAST_MODE_S_LONG  # noqa: E402
+from discovery import DNS_CLASS_IN, DNS_TYPE_A, DNS_TYPE_PTR, mdns_hosts  # noqa: E402
+from modes import CALLSIGN_CHARSET, cpr_nl, crc24  # noqa: E402
+from scanner import ADSB_HTTP_PATHS, ADSBScanner  # noqa: E402
+
+TICK = 0.1  # seconds between sky updates and stream writes
+BEAST_CLOCK = 12_000_000  # Beast timestamps count 12 MHz ticks
+WRITE_BUFFER_LIMIT = 1024 * 1024  # drop output for clients this far behind
+
+RAW_PORTS = {"beast": 30005, "sbs": 30003, "avr": 30002}
+
+# DNS-SD service type each simulated service is advertised as
+MDNS_SERVICES = {
+    "http": "_tar1090._tcp.local",
+    "beast": "_beast._tcp.local",
+    "sbs": "_sbs._tcp.local",
+    "avr": "_adsb._tcp.local",
+}
+MDNS_TTL = 120
+
+# What each simulated host exposes
+PROFILES = {
+    "full": ("http", "beast", "sbs", "avr"),
+    "http": ("http",),
+    "beast": ("beast",),
+    "sbs": ("sbs",),
+    "avr": ("avr",),
+    "decoy": ("decoy",),  # web server on the HTTP port that is not a receiver
+    "silent": (),
+}
+PATHS = ("straight", "circle", "climb")
+
+# One aircraft's transmissions in order: a position is about every 0.5 s
+# and a velocity in between, with identification every few seconds.
+MESSAGE_CYCLE = ("position", "velocity") * 5 + ("identification",)
+
+ALTITUDE_MIN = 1000
+ALTITUDE_MAX = 40000
+KNOTS_TO_DEG = 1 / 3600 / 60  # degrees of latitude per knot-second
+
+
+class Flight:
+    """One simulated aircraft moving along a flight path."""
+
+    def __init__(self, icao: int, rng: random.Random, center: tuple, radius: float, path: str):
+        """Place the aircraft somewhere within radius NM of center."""
+        self.icao = icao
+        self.path = rng.choice(PATHS) if path == "mixed" else path
+        self.center = center
+        self.radius = radius / 60  # degrees of latitude
+        bearing = rng.uniform(0, 2 * math.pi)
+        distance = self.radius * math.sqrt(rng.random())
+        self.lat = center[0] + distance * math.cos(bearing)
+        self.lon = center[1] + distance * math.sin(bearing) / math.cos(math.radians(center[0]))
+        self.alt = rng.randrange(ALTITUDE_MIN, ALTITUDE_MAX, 25)
+        self.gs = rng.uniform(140, 480)
+        self.track = rng.uniform(0, 360)
+        self.vrate = rng.choice((-1, 1)) * rng.randrange(640, 2560, 64) if self.path == "climb" else 0
+        self.turn = rng.choice((-1, 1)) * rng.uniform(1, 3)  # degrees per second
+        self.callsign = f"{rng.choice(('BAW', 'EZY', 'RYR', 'DLH', 'KLM'))}{rng.randrange(10, 9999)}"
+        self.squawk = f"{rng.randrange(0o10000):04o}"
+        self.category = "A3"
+        self.rssi = rng.uniform(-30, -3)
+        self.credit = rng.random()  # spreads transmissions across ticks
+        self.sequence = rng.randrange(len(MESSAGE_CYCLE))
+        self.odd = 0
+        self.messages = 0
+        self.seen = self.seen_pos = 0.0
+
+    def advance(self, dt: float):
+        """Move the aircraft dt seconds along its path."""
+        if self.path == "circle":
+            self.track = (self.track + self.turn * dt) % 360
+        distance = self.gs * dt * KNOTS_TO_DEG
+        self.lat += distance * math.cos(math.radians(self.track))
+        self.lon += distance * math.sin(math.radians(self.track)) / math.cos(math.radians(self.lat))
+        if math.hypot(self.lat - self.center[0], (self.lon - self.center[1]) * math.cos(math.radians(self.lat))) > self.radius:
+            # Turn back towards the centre when leaving the coverage area
+            self.track = math.degrees(math.atan2(self.center[1] - self.lon, self.center[0] - self.lat)) % 360
+        if self.vrate:
+            self.alt += self.vrate * dt / 60
+            if not ALTITUDE_MIN <= self.alt <= ALTITUDE_MAX:
+                self.vrate = -self.vrate
+                self.alt = min(max(self.alt, ALTITUDE_MIN), ALTITUDE_MAX)
+
+    def transmit(self, rate: float, dt: float, now: float) -> list:
+        """Get the message kinds sent in the last dt seconds at rate messages/s."""
+        self.credit += rate * dt
+        sent = []
+        while self.credit >= 1:
+            self.credit -= 1
+            kind = MESSAGE_CYCLE[self.sequence]
+            self.sequence = (self.sequence + 1) % len(MESSAGE_CYCLE)
+            if kind == "position":
+                self.odd ^= 1
+                self.seen_pos = now
+            sent.append((kind, self.odd))
+        if sent:
+            self.messages += len(sent)
+            self.seen = now
+        return sent
+
+    def to_json(self, now: float) -> dict:
+        """Render the aircraft as an aircraft.json entry."""
+        row = {
+            "hex": f"{self.icao:06x}",
+            "flight": f"{self.callsign:<8}",
+            "alt_baro": int(self.alt) // 25 * 25,
+            "gs": round(self.gs, 1),
+            "track": round(self.track, 1),
+            "baro_rate": int(self.vrate),
+            "squawk": self.squawk,
+            "category": self.category,
+            "messages": self.messages,
+            "seen": round(now - self.seen, 1) if self.seen else 0,
+            "rssi": round(self.rssi, 1),
+        }
+        if self.seen_pos:
+            row.update(
+                lat=round(self.lat, 6), lon=round(self.lon, 6), nic=8,
+                seen_pos=round(now - self.seen_pos, 1),
+            )
+        return row
+
+
+def encode_ac12(alt: float) -> int:
+    """Encode an altitude as the 12-bit Q=1 code of an airborne position."""
+    n = max(0, int(round((alt + 1000) / 25)))
+    return ((n << 1) & 0xFE0) | 0x10 | (n & 0x0F)
+
+
+def encode_cpr(lat: float, lon: float, odd: int) -> tuple:
+    """Encode a position as 17-bit airborne CPR latitude and longitude."""
+    dlat = 360 / (60 - odd)
+    yz = math.floor(131072 * (lat % dlat) / dlat + 0.5)
+    rlat = dlat * (yz / 131072 + math.floor(lat / dlat))
+    dlon = 360 / max(cpr_nl(rlat) - odd, 1)
+    xz = math.floor(131072 * (lon % dlon) / dlon + 0.5)
+    return yz & 0x1FFFF, xz & 0x1FFFF
+
+
+def extended_squitter(icao: int, me: int) -> bytes:
+    """Build a DF17 frame with valid parity."""
+    frame = bytes((17 << 3 | 5,)) + icao.to_bytes(3, "big") + me.to_bytes(7, "big")
+    return frame + crc24(frame).to_bytes(3, "big")
+
+
+def encode_message(flight: Flight, kind: str, odd: int) -> bytes:
+    """Encode one transmission of a flight as a Mode S frame."""
+    if kind == "position":
+        lat, lon = encode_cpr(flight.lat, flight.lon, odd)
+        me = 11 << 51 | encode_ac12(flight.alt) << 36 | odd << 34 | lat << 17 | lon
+    elif kind == "velocity":
+        v_ew = flight.gs * math.sin(math.radians(flight.track))
+        v_ns = flight.gs * math.cos(math.radians(flight.track))
+        vr = min(abs(int(flight.vrate)) // 64 + 1, 0x1FF)
+        me = (
+            19 << 51 | 1 << 48
+            | (v_ew < 0) << 42 | min(int(round(abs(v_ew))) + 1, 0x3FF) << 32
+            | (v_ns < 0) << 31 | min(int(round(abs(v_ns))) + 1, 0x3FF) << 21
+            | 1 << 20 | (flight.vrate < 0) << 19 | vr << 10
+        )
+    else:
+        chars = 0
+        for char in f"{flight.callsign:<8}"[:8]:
+            chars = chars << 6 | max(CALLSIGN_CHARSET.find(char), 0)
+        me = 4 << 51 | 3 << 48 | chars
+    return extended_squitter(flight.icao, me)
+
+
+def beast_frame(message: bytes, timestamp: int, signal: int) -> bytes:
+    """Wrap a Mode S frame in Beast framing, escaping 0x1A bytes."""
+    body = timestamp.to_bytes(6, "big") + bytes((signal,)) + message
+    escape = bytes((BEAST_ESCAPE,))
+    return escape + bytes((BEAST_MODE_S_LONG,)) + body.replace(escape, escape * 2)
+
+
+def sbs_line(flight: Flight, kind: str, now: float) -> bytes:
+    """Render one transmission as a BaseStation MSG line."""
+    stamp = datetime.fromtimestamp(now)
+    date, clock = stamp.strftime("%Y/%m/%d"), stamp.strftime("%H:%M:%S.%f")[:-3]
+    fields = [""] * 22
+    fields[:10] = ["MSG", "", "1", "1", f"{flight.icao:06X}", "1", date, clock, date, clock]
+    if kind == "position":
+        fields[1] = "3"
+        fields[11] = str(int(flight.alt) // 25 * 25)
+        fields[14], fields[15] = f"{flight.lat:.5f}", f"{flight.lon:.5f}"
+        fields[21] = "0"
+    elif kind == "velocity":
+        fields[1] = "4"
+        fields[12], fields[13] = f"{flight.gs:.0f}", f"{flight.track:.0f}"
+        fields[16] = str(int(flight.vrate) // 64 * 64)
+    else:
+        fields[1] = "1"
+        fields[10] = flight.callsign
+        fields[17] = flight.squawk
+    return (",".join(fields) + "\r\n").encode()
+
+
+class FakeReceiver:
+    """One simulated receiver host and the aircraft it can hear."""
+
+    def __init__(self, host: str, profile: str, flights: list, path: str, http_port: int):
+        """Initialize receiver."""
+        self.host = host
+        self.profile = profile
+        self.services = PROFILES[profile]
+        self.flights = flights
+        self.path = path
+        self.http_port = http_port
+        self.messages = 0
+        self.requests = 0
+        self.clients = {protocol: set() for protocol in RAW_PORTS}
+        self._servers = []
+        self._runner = None
+        self._rendered = (None, b"")
+
+    @property
+    def detectable(self) -> bool:
+        """Check if the scanner should report this host."""
+        return any(service in RAW_PORTS or service == "http" for service in self.services)
+
+    async def start(self):
+        """Bind the services of this receiver's profile."""
+        if "http" in self.services or "decoy" in self.services:
+            app = web.Application()
+            if "http" in self.services:
+                base = self.path.rsplit("/", 1)[0]
+                app.router.add_get(self.path, self._aircraft_json)
+                app.router.add_get(f"{base}/receiver.json", self._receiver_json)
+            else:
+                app.router.add_get("/{tail:.*}", self._decoy)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.http_port).start()
+
+        for protocol, port in RAW_PORTS.items():
+            if protocol in self.services:
+                self._servers.append(await asyncio.start_server(
+                    lambda r, w, protocol=protocol: self._stream_client(protocol, r, w),
+                    self.host, port,
+                ))
+
+    async def stop(self):
+        """Close all listeners and connections."""
+        for clients in self.clients.values():
+            for writer in list(clients):
+                writer.close()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _aircraft_json(self, request: web.Request) -> web.Response:
+        """Serve the current sky, rendered at most once per tick."""
+        self.requests += 1
+        now = round(time.time(), 1)
+        if self._rendered[0] != now:
+            self._rendered = (now, json.dumps({
+                "now": now,
+                "messages": self.messages,
+                "aircraft": [flight.to_json(now) for flight in self.flights],
+            }).encode())
+        return web.Response(body=self._rendered[1], content_type="application/json")
+
+    async def _receiver_json(self, request: web.Request) -> web.Response:
+        """Serve receiver.json."""
+        return web.json_response({
+            "version": "fake-receiver",
+            "refresh": 1000,
+            "history": 0,
+            "lat": self.flights[0].center[0] if self.flights else 0,
+            "lon": self.flights[0].center[1] if self.flights else 0,
+        })
+
+    async def _decoy(self, request: web.Request) -> web.Response:
+        """Answer like an unrelated web server."""
+        if request.path.endswith(".json"):
+            raise web.HTTPNotFound()
+        return web.Response(text="<html><body>Router login</body></html>", content_type="text/html")
+
+    async def _stream_client(self, protocol: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Hold a raw feed client until it disconnects."""
+        self.clients[protocol].add(writer)
+        try:
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients[protocol].discard(writer)
+            writer.close()
+
+    def broadcast(self, sent: list, now: float):
+        """Send this tick's transmissions to every connected raw feed client."""
+        self.messages += len(sent)
+        if not any(self.clients.values()):
+            return
+
+        frames = {}
+        if self.clients["beast"] or self.clients["avr"]:
+            messages = [(flight, encode_message(flight, kind, odd)) for flight, kind, odd in sent]
+            if self.clients["beast"]:
+                timestamp = int(now * BEAST_CLOCK) & 0xFFFFFFFFFFFF
+                frames["beast"] = b"".join(
+                    beast_frame(message, timestamp, min(255, int(255 * 10 ** (flight.rssi / 20))))
+                    for flight, message in messages
+                )
+            if self.clients["avr"]:
+                frames["avr"] = b"".join(b"*%s;\n" % message.hex().upper().encode() for _, message in messages)
+        if self.clients["sbs"]:
+            frames["sbs"] = b"".join(sbs_line(flight, kind, now) for flight, kind, _ in sent)
+
+        for protocol, data in frames.items():
+            for writer in list(self.clients[protocol]):
+                if writer.transport.get_write_buffer_size() < WRITE_BUFFER_LIMIT:
+                    writer.write(data)
+
+
+class Simulator:
+    """A simulated sky shared by a set of fake receivers."""
+
+    def __init__(
+        self,
+        hosts: list,
+        profiles: list,
+        aircraft: int = 100,
+        rate: float = 6.0,
+        path: str = "mixed",
+        overlap: float = 0.0,
+        center: tuple = (51.47, -0.45),
+        radius: float = 100,
+        http_port: int = 8080,
+        seed: int = 1,
+    ):
+        """
+        Initialize simulator.
+
+        Args:
+            hosts: Addresses to bind, one receiver each
+            profiles: Profile names, cycled over the hosts
+            aircraft: Aircraft heard by each receiver
+            rate: Messages per second per aircraft
+            path: Flight path (straight, circle, climb or mixed)
+            overlap: Fraction of each receiver's aircraft also heard by the others
+            center: Latitude and longitude of the coverage area
+            radius: Coverage radius in nautical miles
+            http_port: Port for the HTTP services
+            seed: Random seed, so runs are repeatable
+        """
+        self.rate = rate
+        rng = random.Random(seed)
+        shared = int(aircraft * overlap)
+        pool = {}
+
+        def flight(index: int) -> Flight:
+            if index not in pool:
+                pool[index] = Flight(0x400000 + index, rng, center, radius, path)
+            return pool[index]
+
+        self.receivers = []
+        for i, host in enumerate(hosts):
+            unique = shared + i * (aircraft - shared)
+            flights = [flight(n) for n in range(shared)]
+            flights += [flight(n) for n in range(unique, unique + aircraft - shared)]
+            receiver_path = ADSB_HTTP_PATHS[i % len(ADSB_HTTP_PATHS)]
+            self.receivers.append(
+                FakeReceiver(host, profiles[i % len(profiles)], flights, receiver_path, http_port)
+            )
+        self.flights = list(pool.values())
+        self._task = None
+
+    async def start(self):
+        """Bind every receiver and start the sky."""
+        for receiver in self.receivers:
+            await receiver.start()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the sky and unbind every receiver."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        for receiver in self.receivers:
+            await receiver.stop()
+
+    async def _run(self):
+        """Advance the sky and feed the receivers every tick."""
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(TICK)
+            now = time.monotonic()
+            dt, last = now - last, now
+            wall = time.time()
+            sent = {}
+            for flight in self.flights:
+                flight.advance(dt)
+                kinds = flight.transmit(self.rate, dt, wall)
+                if kinds:
+                    sent[flight.icao] = kinds
+            for receiver in self.receivers:
+                receiver.broadcast(
+                    [(flight, kind, odd) for flight in receiver.flights for kind, odd in sent.get(flight.icao, ())],
+                    wall,
+                )
+
+
+def dns_name(name: str) -> bytes:
+    """Encode a dotted name as uncompressed DNS labels."""
+    return b"".join(bytes((len(label),)) + label.encode() for label in name.split(".") if label) + b"\0"
+
+
+def dns_questions(packet: bytes) -> list:
+    """Read the question names of an uncompressed DNS query."""
+    (count,) = struct.unpack_from("!H", packet, 4)
+    names, offset = [], 12
+    for _ in range(count):
+        labels = []
+        while packet[offset]:
+            length = packet[offset]
+            labels.append(packet[offset + 1:offset + 1 + length].decode("utf-8", "replace"))
+            offset += 1 + length
+        names.append(".".join(labels).lower())
+        offset += 5  # terminating label, type and class
+    return names
+
+
+class MDNSResponder(asyncio.DatagramProtocol):
+    """
+    Answers DNS-SD PTR queries like the mDNS responders of feeder images.
+
+    Each receiver whose services match a question gets its own unicast
+    response, with a PTR per matching service type and the receiver's A
+    record. Binds a unicast address, so the add-on's query can be sent to
+    it instead of the multicast group.
+    """
+
+    def __init__(self, receivers: list):
+        """Initialize responder."""
+        self.receivers = receivers
+        self.queries = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        """Keep the transport for replies."""
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        """Answer the service types each receiver offers."""
+        try:
+            asked = set(dns_questions(data))
+        except (struct.error, IndexError):
+            return
+        self.queries += 1
+        query_id = data[:2]
+        for receiver in self.receivers:
+            types = [MDNS_SERVICES[service] for service in receiver.services if MDNS_SERVICES.get(service) in asked]
+            if not types:
+                continue
+            hostname = f"adsb-{receiver.host.replace('.', '-')}.local"
+            answers = b"".join(
+                dns_name(service_type)
+                + struct.pack("!HHIH", DNS_TYPE_PTR, DNS_CLASS_IN, MDNS_TTL, len(dns_name(f"fake.{service_type}")))
+                + dns_name(f"fake.{service_type}")
+                for service_type in types
+            )
+            address = dns_name(hostname) + struct.pack("!HHIH", DNS_TYPE_A, DNS_CLASS_IN, MDNS_TTL, 4)
+            address += socket.inet_aton(receiver.host)
+            header = query_id + struct.pack("!HHHHH", 0x8400, 0, len(types), 0, 1)
+            self.transport.sendto(header + answers + address, addr)
+
+
+async def mdns(simulator: Simulator, host: str) -> bool:
+    """Run discovery.mdns_hosts against a responder for the simulated receivers."""
+    expected = {
+        receiver.host for receiver in simulator.receivers
+        if any(service in MDNS_SERVICES for service in receiver.services)
+    }
+    loop = asyncio.get_running_loop()
+    transport, responder = await loop.create_datagram_endpoint(
+        lambda: MDNSResponder(simulator.receivers), local_addr=(host, 0)
+    )
+    try:
+        port = transport.get_extra_info("sockname")[1]
+        hosts = await mdns_hosts(group=host, port=port)
+    finally:
+        transport.close()
+
+    print(f"mDNS found {len(set(hosts) & expected)}/{len(expected)} advertising receivers ({responder.queries} queries)")
+    for found in hosts:
+        print(f"  {found}{'' if found in expected else ' (unexpected)'}")
+    for missed in sorted(expected - set(hosts), key=ipaddress.IPv4Address):
+        print(f"  missed {missed}")
+    return set(hosts) == expected
+
+
+def host_range(base: str, count: int) -> list:
+    """List count consecutive addresses starting at base."""
+    start = ipaddress.IPv4Address(base)
+    return [str(start + i) for i in range(count)]
+
+
+async def scan(simulator: Simulator, network: str, timeout: int):
+    """Sweep the simulated subnet with ADSBScanner and compare with what is there."""
+    expected = {receiver.host for receiver in simulator.receivers if receiver.detectable}
+    scanner = ADSBScanner(timeout=timeout, networks=[network])
+    try:
+        started = time.monotonic()
+        found = await scanner.scan_network(limit=max(1, len(expected)))
+        elapsed = time.monotonic() - started
+    finally:
+        await scanner.close()
+
+    hosts = {device["host"] for device in found}
+    print(f"Found {len(hosts & expected)}/{len(expected)} receivers in {elapsed:.2f}s: {scanner.last_scan_stats}")
+    for device in found:
+        print(f"  {device['host']}:{device['port']} {device['transport']} {device.get('endpoint') or ''}")
+    for host in sorted(expected - hosts, key=ipaddress.IPv4Address):
+        print(f"  missed {host}")
+    for host in sorted(hosts - expected, key=ipaddress.IPv4Address):
+        print(f"  unexpected {host}")
+
+
+async def poll(simulator: Simulator, polls: int, timeout: int) -> bool:
+    """
+    Poll each simulated receiver alone through ADSBScanner, like a single detected device.
+
+    Checks that one receiver keeps its Receiver across polls and fills the
+    scanner's combined table, which the sensors and metrics read.
+    """
+    ok = True
+    for receiver in simulator.receivers:
+        if "http" in receiver.services:
+            device = {"host": receiver.host, "port": receiver.http_port, "type": "fake",
+                      "endpoint": receiver.path, "transport": "http"}
+        elif any(service in RAW_PORTS for service in receiver.services):
+            port = next(RAW_PORTS[service] for service in RAW_PORTS if service in receiver.services)
+            device = {"host": receiver.host, "port": port, "type": "fake",
+                      "endpoint": None, "transport": "tcp"}
+        else:
+            continue
+
+        scanner = ADSBScanner(timeout=timeout)
+        scanner.detected_device = device
+        instances = set()
+        try:
+            for _ in range(polls):
+                data = None
+                deadline = time.monotonic() + 5
+                while data is None and time.monotonic() < deadline:
+                    data = await scanner.get_aircraft_data()
+                    if data is None:
+                        await asyncio.sleep(0.2)  # raw feeds need a moment to connect
+                instances.update(scanner.receivers.values())
+                await asyncio.sleep(1)
+        finally:
+            await scanner.close()
+
+        total = scanner.aircraft.summary()["total"]
+        passed = data is not None and total == len(receiver.flights) and len(instances) == 1
+        ok &= passed
+        print(
+            f"  {receiver.host} {device['transport']}:{device['port']}: "
+            f"{total}/{len(receiver.flights)} aircraft in the scanner table, "
+            f"{len(instances)} Receiver instance(s) over {polls} polls - {'ok' if passed else 'FAILED'}"
+        )
+    return ok
+
+
+async def serve(args):
+    """Run the simulator until interrupted, or for --duration seconds."""
+    hosts = host_range(args.base, args.receivers)
+    simulator = Simulator(
+        hosts,
+        args.profiles.split(","),
+        aircraft=args.aircraft,
+        rate=args.rate,
+        path=args.path,
+        overlap=args.overlap,
+        center=tuple(float(value) for value in args.center.split(",")),
+        radius=args.radius,
+        http_port=args.http_port,
+        seed=args.seed,
+    )
+    await simulator.start()
+    print(f"Simulating {len(simulator.flights)} aircraft on {len(hosts)} receivers ({hosts[0]}-{hosts[-1]})")
+    for receiver in simulator.receivers:
+        services = ", ".join(receiver.services) or "nothing"
+        print(f"  {receiver.host}: {receiver.profile} ({services})")
+
+    try:
+        if args.scan:
+            network = ipaddress.IPv4Network(f"{args.base}/24", strict=False)
+            await scan(simulator, args.network or str(network), args.timeout)
+        elif args.mdns:
+            if not await mdns(simulator, args.base):
+                raise SystemExit(1)
+        elif args.poll:
+            if not await poll(simulator, args.poll, args.timeout):
+                raise SystemExit(1)
+        else:
+            started = time.monotonic()
+            while not args.duration or time.monotonic() - started < args.duration:
+                await asyncio.sleep(10)
+                messages = sum(receiver.messages for receiver in simulator.receivers)
+                clients = sum(len(c) for receiver in simulator.receivers for c in receiver.clients.values())
+                requests = sum(receiver.requests for receiver in simulator.receivers)
+                print(f"{messages} messages, {clients} stream clients, {requests} aircraft.json requests")
+    finally:
+        await simulator.stop()
+
+
+def main():
+    """Run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receivers", type=int, default=1, help="Number of simulated hosts")
+    parser.add_argument("--base", default="127.0.0.1", help="First address to bind")
+    parser.add_argument("--profiles", default="full", help=f"Comma separated, from {', '.join(PROFILES)}")
+    parser.add_argument("--aircraft", type=int, default=100, help="Aircraft per receiver")
+    parser.add_argument("--rate", type=float, default=6.0, help="Messages per second per aircraft")
+    parser.add_argument("--path", default="mixed", choices=PATHS + ("mixed",))
+    parser.add_argument("--overlap", type=float, default=0.0, help="Fraction of aircraft shared by all receivers")
+    parser.add_argument("--center", default="51.47,-0.45", help="Coverage centre as lat,lon")
+    parser.add_argument("--radius", type=float, default=100, help="Coverage radius in NM")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=0, help="Seconds to run, 0 for until interrupted")
+    parser.add_argument("--scan", action="store_true", help="Sweep the simulated subnet with ADSBScanner and exit")
+    parser.add_argument("--poll", type=int, default=0, help="Poll each receiver this many times with ADSBScanner and exit")
+    parser.add_argument("--mdns", action="store_true", help="Answer mDNS queries for the receivers, run the add-on's query against it and exit")
+    parser.add_argument("--network", help="Network to sweep with --scan (default: the /24 around --base)")
+    parser.add_argument("--timeout", type=int, default=1, help="Scanner timeout for --scan")
+    args = parser.parse_args()
+
+    unknown = set(args.profiles.split(",")) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Aircraft Acquisition - Single owner of aircraft data fetching."""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aircraft_db import AircraftDB
+from metrics import LOOP_LAG
+from scanner import ADSBScanner
+from scheduler import PollScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# Subscribers receive (aircraft_data, summary); aircraft_data is None while
+# no receiver is available.
+Subscriber = Callable[[Optional[Dict], Dict], Awaitable[None]]
+
+
+class AircraftAcquisition:
+    """
+    Fetches aircraft data on one schedule and fans snapshots out to subscribers.
+
+    Concurrent `fetch` calls share a single in-flight request, so the
+    receiver is never polled twice for the same snapshot. The delay between
+    polls comes from a PollScheduler fed with each cycle's outcome. With an
+    AircraftDB, aircraft are enriched with registration and type before
+    subscribers see them.
+    """
+
+    def __init__(
+        self,
+        scanner: ADSBScanner,
+        scheduler: Optional[PollScheduler] = None,
+        aircraft_db: Optional[AircraftDB] = None,
+    ):
+        """Initialize acquisition."""
+        self.scanner = scanner
+        self.scheduler = scheduler or PollScheduler()
+        self.aircraft_db = aircraft_db
+        self.running = False
+        self._device_key = None
+        self._last_poll = time.time()
+        self._wake = asyncio.Event()
+        self._subscribers: List[Subscriber] = []
+        self._inflight: Optional[asyncio.Future] = None
+
+    def subscribe(self, callback: Subscriber):
+        """Register a coroutine to receive every snapshot."""
+        self._subscribers.append(callback)
+
+    async def fetch(self) -> Optional[Dict]:
+        """Get the current snapshot, joining a fetch that is already running."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self.scanner.get_aircraft_data())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Shield so one cancelled caller does not abort the shared request
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future):
+        """Forget a finished fetch so the next call starts a new one."""
+        if self._inflight is future:
+            self._inflight = None
+
+    async def publish(self, aircraft_data: Optional[Dict]):
+        """Hand a snapshot to every subscriber concurrently."""
+        summary = self.scanner.aircraft.summary()
+        if aircraft_data and self.aircraft_db:
+            self.aircraft_db.enrich(aircraft_data.get("aircraft", ()))
+        results = await asyncio.gather(
+            *(callback(aircraft_data, summary) for callback in self._subscribers),
+            return_exceptions=True
+        )
+        for callback, result in zip(self._subscribers, results):
+            if isinstance(result, Exception):
+                _LOGGER.error(f"Aircraft data subscriber {callback.__qualname__} failed: {result}")
+
+    @staticmethod
+    def _key(device: Optional[Dict]):
+        """Identify a device for change detection."""
+        return (device["host"], device["port"], device.get("endpoint")) if device else None
+
+    def device_changed(self):
+        """Poll right away if discovery switched to a different device."""
+        if self._key(self.scanner.detected_device) != self._device_key:
+            self._wake.set()
+
+    async def _refresh_receiver_info(self):
+        """Pick up the receiver's own update interval when the device changes."""
+        device = self.scanner.detected_device
+        key = self._key(device)
+        if key == self._device_key:
+            return
+        self._device_key = key
+
+        refresh = None
+        info = await self.scanner.get_receiver_info() if device else None
+        if info and isinstance(info.get("refresh"), (int, float)):
+            refresh = info["refresh"] / 1000  # milliseconds
+            _LOGGER.info(f"Receiver refreshes every {refresh:g}s")
+        self.scheduler.set_refresh(refresh)
+
+    def _next_interval(self, aircraft_data: Optional[Dict]) -> float:
+        """Ask the scheduler how long to wait after this cycle."""
+        now = time.time()
+        table = self.scanner.aircraft
+        interval = self.scheduler.next_interval(
+            aircraft_data is not None,
+            aircraft=len(table),
+            position_updates=table.positions_since(self._last_poll),
+        )
+        self._last_poll = now
+        return interval
+
+    async def run(self):
+        """Poll the detected device and publish snapshots until stopped."""
+        self.running = True
+        while self.running:
+            aircraft_data = None
+            try:
+                await self._refresh_receiver_info()
+                if self.scanner.detected_device:
+                    aircraft_data = await self.fetch()
+                await self.publish(aircraft_data)
+            except Exception as e:
+                _LOGGER.error(f"Error updating aircraft data: {e}")
+
+            interval = self._next_interval(aircraft_data)
+            _LOGGER.debug(f"Next aircraft poll in {interval:.1f}s")
+            deadline = time.monotonic() + interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                LOOP_LAG.observe(max(0.0, time.monotonic() - deadline), loop="update")
+            self._wake.clear()
+
+    def stop(self):
+        """Stop polling after the current cycle."""
+        self.running = False
+        self._wake.set()
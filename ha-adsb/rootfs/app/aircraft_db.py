@@ -0,0 +1,330 @@
+"""Aircraft Database - Memory-mapped ICAO index built from the tar1090 aircraft database."""
+import bisect
+import gzip
+import heapq
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+AIRCRAFT_DB_PATH = "/data/aircraft_db.bin"
+
+# File layout: header, sorted 3-byte ICAO keys, then one record per key.
+# Keys are kept apart from records so a binary search only touches the
+# pages of the key array.
+HEADER = struct.Struct("<8sI")
+MAGIC = b"ADSBDB1\0"
+KEY_SIZE = 3
+RECORD = struct.Struct("12s4sB")  # registration, ICAO type code, flags
+
+# tar1090 db flag characters, in order
+FLAG_MILITARY = 0x1
+FLAG_INTERESTING = 0x2
+FLAG_PIA = 0x4
+FLAG_LADD = 0x8
+DB_FLAGS = (FLAG_MILITARY, FLAG_INTERESTING, FLAG_PIA, FLAG_LADD)
+
+GZIP_MAGIC = b"\x1f\x8b"
+SHARD_SUFFIXES = (".js", ".json")
+
+
+def _read_shard(path: Path) -> Dict:
+    """Read one db shard, which tar1090 may store gzipped under a .js name."""
+    data = path.read_bytes()
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def _pack(icao: int, entry: list) -> Optional[bytes]:
+    """Pack a db entry as key followed by record, so sorting packs sorts by ICAO."""
+    if not isinstance(entry, list) or not entry:
+        return None
+    registration = (entry[0] or "").encode("ascii", "replace")[:12]
+    type_code = (entry[1] or "").encode("ascii", "replace")[:4] if len(entry) > 1 else b""
+    flag_text = (entry[2] or "") if len(entry) > 2 else ""
+    flags = 0
+    for char, bit in zip(flag_text, DB_FLAGS):
+        if char == "1":
+            flags |= bit
+    return icao.to_bytes(KEY_SIZE, "big") + RECORD.pack(registration, type_code, flags)
+
+
+def _owner(hex_icao: str, shards: Set[str]) -> Optional[str]:
+    """Get the shard holding an address: the one named by its longest prefix."""
+    for length in range(len(hex_icao), -1, -1):
+        if hex_icao[:length] in shards:
+            return hex_icao[:length]
+    return None
+
+
+class _Keys:
+    """Sequence view of the key array, for bisect."""
+
+    def __init__(self, buf: mmap.mmap, count: int):
+        """Initialize view."""
+        self.buf = buf
+        self.count = count
+
+    def __len__(self) -> int:
+        """Get the number of keys."""
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        """Get one key."""
+        start = HEADER.size + index * KEY_SIZE
+        return self.buf[start:start + KEY_SIZE]
+
+
+class AircraftDB:
+    """
+    Registration, type and flags by ICAO address.
+
+    The index is a sorted, fixed-width binary file read through mmap, so
+    lookups are a binary search that only faults in the pages it touches
+    and the database costs almost no resident memory. It is rebuilt from
+    the db shards of the installed tar1090; a manifest of shard sizes and
+    modification times lets a rebuild re-read only the shards that changed.
+    """
+
+    def __init__(self, path: str = AIRCRAFT_DB_PATH):
+        """Initialize database."""
+        self.path = Path(path)
+        self.manifest_path = self.path.with_name(f"{self.path.name}.manifest.json")
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._keys: Optional[_Keys] = None
+        self.count = 0
+
+    def open(self) -> bool:
+        """Map the index file, replacing any previously mapped version."""
+        self.close()
+        try:
+            file = open(self.path, "rb")
+        except OSError:
+            return False
+        try:
+            buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            file.close()
+            return False
+
+        magic, count = HEADER.unpack_from(buf) if len(buf) >= HEADER.size else (b"", 0)
+        if magic != MAGIC or len(buf) != HEADER.size + count * (KEY_SIZE + RECORD.size):
+            _LOGGER.warning(f"Ignoring invalid aircraft database {self.path}")
+            buf.close()
+            file.close()
+            return False
+
+        self._file, self._map, self.count = file, buf, count
+        self._keys = _Keys(buf, count)
+        _LOGGER.debug(f"Aircraft database mapped: {count} aircraft")
+        return True
+
+    def close(self):
+        """Unmap the index."""
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._file = self._map = self._keys = None
+        self.count = 0
+
+    def _record(self, index: int) -> Tuple[str, str, int]:
+        """Unpack the record at an index."""
+        offset = HEADER.size + self.count * KEY_SIZE + index * RECORD.size
+        registration, type_code, flags = RECORD.unpack_from(self._map, offset)
+        return (
+            registration.rstrip(b"\0").decode("ascii"),
+            type_code.rstrip(b"\0").decode("ascii"),
+            flags,
+        )
+
+    def lookup(self, icao: int) -> Optional[Tuple[str, str, int]]:
+        """
+        Look up an aircraft.
+
+        Args:
+            icao: 24-bit ICAO address
+
+        Returns:
+            (registration, type code, flags), or None if unknown
+        """
+        if not self._keys:
+            return None
+        key = icao.to_bytes(KEY_SIZE, "big")
+        index = bisect.bisect_left(self._keys, key)
+        if index < self.count and self._keys[index] == key:
+            return self._record(index)
+        return None
+
+    def enrich(self, aircraft: Iterable[Dict]) -> int:
+        """
+        Add registration ("r"), type ("t") and flags ("dbFlags") to aircraft.
+
+        Uses the field names readsb writes when it has a database of its
+        own; fields the receiver already filled in are kept.
+
+        Args:
+            aircraft: Entries in the aircraft.json format
+
+        Returns:
+            Number of aircraft found in the database
+        """
+        if not self._keys:
+            return 0
+        found = 0
+        for ac in aircraft:
+            if "dbFlags" in ac:
+                found += 1
+                continue
+            try:
+                icao = int(ac["hex"], 16)
+            except (KeyError, TypeError, ValueError):
+                continue  # non-ICAO (~) addresses
+            entry = self.lookup(icao)
+            if entry is None:
+                continue
+            registration, type_code, flags = entry
+            if registration:
+                ac.setdefault("r", registration)
+            if type_code:
+                ac.setdefault("t", type_code)
+            ac["dbFlags"] = flags
+            found += 1
+        return found
+
+    def _iter_packed(self) -> Iterator[bytes]:
+        """Yield every entry of the mapped index as packed key and record."""
+        buf, count = self._map, self.count
+        records = HEADER.size + count * KEY_SIZE
+        for index in range(count):
+            key_start = HEADER.size + index * KEY_SIZE
+            record_start = records + index * RECORD.size
+            yield buf[key_start:key_start + KEY_SIZE] + buf[record_start:record_start + RECORD.size]
+
+    def _load_manifest(self) -> Dict[str, list]:
+        """Load the shard manifest of the current index."""
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def rebuild(self, db_dir: str) -> bool:
+        """
+        Update the index file from tar1090 db shards.
+
+        Runs in an executor; the caller re-opens the index afterwards. Only
+        shards whose size or modification time changed since the last build
+        are parsed; entries of unchanged shards are copied from the
+        existing index.
+
+        Args:
+            db_dir: tar1090 html/db directory
+
+        Returns:
+            True if a new index file was written
+        """
+        db_path = Path(db_dir)
+        if not db_path.is_dir():
+            _LOGGER.debug(f"No aircraft database in {db_dir}")
+            return False
+
+        shards = {}
+        for path in db_path.iterdir():
+            if path.suffix in SHARD_SUFFIXES and path.is_file():
+                stat = path.stat()
+                shards[path.stem.upper()] = (path, [stat.st_size, stat.st_mtime_ns])
+
+        # Entries of the previous index are reused unless their shard changed
+        old = AircraftDB(str(self.path))
+        try:
+            old_manifest = self._load_manifest() if old.open() else {}
+            manifest = {name: stamp for name, (_, stamp) in shards.items()}
+            if manifest == old_manifest:
+                return False
+
+            changed = {name for name, stamp in manifest.items() if old_manifest.get(name) != stamp}
+            changed.update(set(old_manifest) - set(manifest))
+            _LOGGER.info(
+                f"Building aircraft database index ({len(changed)} of {len(shards)} shards changed)"
+            )
+
+            new_entries, failed = self._parse_shards(
+                [shards[name][0] for name in changed if name in shards]
+            )
+            for name in failed:
+                del manifest[name]  # retried on the next rebuild
+
+            all_shards = set(old_manifest) | set(manifest) | set(failed)
+            kept = (
+                packed for packed in old._iter_packed()
+                if _owner(packed[:KEY_SIZE].hex().upper(), all_shards) not in changed
+            ) if old_manifest else ()
+            # New entries first, so they win over a kept entry for the same address
+            count = self._write(heapq.merge(new_entries, kept, key=lambda packed: packed[:KEY_SIZE]))
+        finally:
+            old.close()
+
+        tmp_manifest = self.manifest_path.with_name(f".{self.manifest_path.name}.tmp")
+        tmp_manifest.write_text(json.dumps(manifest))
+        os.replace(tmp_manifest, self.manifest_path)
+        _LOGGER.info(f"Aircraft database index written: {count} aircraft")
+        return True
+
+    @staticmethod
+    def _parse_shards(paths: List[Path]) -> Tuple[List[bytes], List[str]]:
+        """Read shards into sorted packed entries, also returning unreadable shards."""
+        entries = []
+        failed = []
+        for path in paths:
+            prefix = path.stem.upper()
+            try:
+                shard = _read_shard(path)
+            except (OSError, ValueError) as e:
+                _LOGGER.warning(f"Skipping unreadable aircraft database shard {path.name}: {e}")
+                failed.append(prefix)
+                continue
+            for suffix, entry in shard.items():
+                if suffix == "children":
+                    continue
+                try:
+                    icao = int(prefix + suffix, 16)
+                except ValueError:
+                    continue
+                if icao > 0xFFFFFF:
+                    continue
+                packed = _pack(icao, entry)
+                if packed is not None:
+                    entries.append(packed)
+        entries.sort()
+        return entries, failed
+
+    def _write(self, entries: Iterable[bytes]) -> int:
+        """Write sorted packed entries as a new index file, atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        count = 0
+        last_key = None
+        with open(tmp_path, "wb") as out, tempfile.TemporaryFile(dir=self.path.parent) as records:
+            out.write(HEADER.pack(MAGIC, 0))
+            for packed in entries:
+                key = packed[:KEY_SIZE]
+                if key == last_key:
+                    continue  # duplicate address in two shards
+                last_key = key
+                out.write(key)
+                records.write(packed[KEY_SIZE:])
+                count += 1
+            records.seek(0)
+            shutil.copyfileobj(records, out)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, count))
+        os.replace(tmp_path, self.path)
+        return count
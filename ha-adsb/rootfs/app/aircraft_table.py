@@ -0,0 +1,292 @@
+"""Aircraft Table - Columnar live aircraft state keyed by ICAO address."""
+import time
+from array import array
+from itertools import compress
+from typing import Any, Dict, List, Optional
+
+# Staleness rules, matching what tar1090 shows by default
+AIRCRAFT_TTL = 300  # seconds without any message before an aircraft is dropped
+POSITION_TTL = 60  # seconds before a position is no longer reported
+# Positions this close in time are ranked by accuracy (NIC) instead of age
+POSITION_TIE = 2  # seconds
+INITIAL_CAPACITY = 256  # slots, doubled when exhausted
+
+NAN = float("nan")
+
+# Fields stored as float64 columns; seen/seen_pos hold absolute epoch times
+NUMERIC_FIELDS = (
+    "lat", "lon", "alt_baro", "alt_geom", "gs", "ias", "tas", "track",
+    "mag_heading", "baro_rate", "geom_rate", "rssi", "nic", "seen", "seen_pos",
+)
+# Fields reported as integers in aircraft.json
+INTEGER_FIELDS = frozenset(("alt_baro", "alt_geom", "ias", "tas", "baro_rate", "geom_rate", "nic"))
+# Fields that describe a position fix and are merged together
+POSITION_FIELDS = ("lat", "lon", "nic", "seen_pos")
+# Fields stored as Python object columns
+TEXT_FIELDS = ("flight", "squawk", "category")
+
+
+class AircraftTable:
+    """
+    Live aircraft state keyed by 24-bit ICAO address.
+
+    Each field lives in its own preallocated column and every aircraft owns
+    one slot across all columns. Evicted slots go onto a free list and are
+    reused, so memory only grows with the peak number of aircraft in view.
+    """
+
+    def __init__(self, ttl: float = AIRCRAFT_TTL, position_ttl: float = POSITION_TTL):
+        """Initialize table."""
+        self.ttl = ttl
+        self.position_ttl = position_ttl
+        self.messages = 0
+        self._index: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._capacity = 0
+        self._icao: List[Optional[int]] = []
+        self._numeric: Dict[str, array] = {name: array("d") for name in NUMERIC_FIELDS}
+        self._text: Dict[str, list] = {name: [] for name in TEXT_FIELDS}
+        self._on_ground = array("b")
+        self._messages = array("L")
+        # id(source table) -> newest `seen` already merged from it
+        self._merged: Dict[int, float] = {}
+        self._grow(INITIAL_CAPACITY)
+
+    def __len__(self) -> int:
+        """Get number of tracked aircraft."""
+        return len(self._index)
+
+    def __bool__(self) -> bool:
+        """A table is always truthy, even when empty, so `table or ...` never replaces it."""
+        return True
+
+    def _grow(self, capacity: int):
+        """Extend every column to the given number of slots."""
+        extra = capacity - self._capacity
+        for column in self._numeric.values():
+            column.extend(array("d", [NAN]) * extra)
+        for column in self._text.values():
+            column.extend([None] * extra)
+        self._on_ground.extend(array("b", [0]) * extra)
+        self._messages.extend(array("L", [0]) * extra)
+        self._icao.extend([None] * extra)
+        self._free.extend(range(capacity - 1, self._capacity - 1, -1))
+        self._capacity = capacity
+
+    def _slot(self, icao: int) -> int:
+        """Get the slot of an aircraft, allocating one if needed."""
+        slot = self._index.get(icao)
+        if slot is None:
+            if not self._free:
+                self._grow(self._capacity * 2)
+            slot = self._free.pop()
+            self._index[icao] = slot
+            self._icao[slot] = icao
+        return slot
+
+    def _release(self, slot: int):
+        """Clear a slot and return it to the free list."""
+        del self._index[self._icao[slot]]
+        self._icao[slot] = None
+        for column in self._numeric.values():
+            column[slot] = NAN
+        for column in self._text.values():
+            column[slot] = None
+        self._on_ground[slot] = 0
+        self._messages[slot] = 0
+        self._free.append(slot)
+
+    def known(self, icao: int) -> bool:
+        """Check if an aircraft is currently tracked."""
+        return icao in self._index
+
+    def touch(self, icao: int, now: float, rssi: Optional[float] = None):
+        """Record a message from an aircraft."""
+        slot = self._slot(icao)
+        self._numeric["seen"][slot] = now
+        self._messages[slot] += 1
+        if rssi is not None:
+            self._numeric["rssi"][slot] = rssi
+
+    def set(self, icao: int, field: str, value: Any):
+        """Set a decoded field on a tracked aircraft."""
+        slot = self._index.get(icao)
+        if slot is None:
+            return
+        if field == "alt_baro":
+            ground = value == "ground"
+            self._on_ground[slot] = ground
+            self._numeric["alt_baro"][slot] = NAN if ground else value
+        elif field in self._numeric:
+            self._numeric[field][slot] = value
+        elif field in self._text:
+            self._text[field][slot] = value
+
+    def set_position(self, icao: int, lat: float, lon: float, now: float):
+        """Set the decoded position of a tracked aircraft."""
+        slot = self._index.get(icao)
+        if slot is not None:
+            self._numeric["lat"][slot] = lat
+            self._numeric["lon"][slot] = lon
+            self._numeric["seen_pos"][slot] = now
+
+    def ingest(self, aircraft_data: Dict):
+        """
+        Merge an aircraft.json document into the table.
+
+        Args:
+            aircraft_data: Parsed aircraft.json with relative seen times
+        """
+        now = aircraft_data.get("now") or time.time()
+        self.messages = aircraft_data.get("messages", self.messages)
+
+        for ac in aircraft_data.get("aircraft", ()):
+            hex_ident = ac.get("hex", "")
+            if not hex_ident or hex_ident[0] == "~":
+                continue
+            icao = int(hex_ident, 16)
+            slot = self._slot(icao)
+            self._messages[slot] = ac.get("messages", self._messages[slot])
+            self._numeric["seen"][slot] = now - ac.get("seen", 0)
+            for field, value in ac.items():
+                if field in ("seen", "seen_pos", "hex", "messages"):
+                    continue
+                if value.__class__ in (int, float) or field == "alt_baro":
+                    self.set(icao, field, value)
+                elif field in self._text:
+                    self._text[field][slot] = value.strip() if field == "flight" else value
+            if "lat" in ac and "lon" in ac:
+                self._numeric["seen_pos"][slot] = now - ac.get("seen_pos", 0)
+
+    def merge(self, sources: List["AircraftTable"]):
+        """
+        Fold other tables into this one, deduplicating aircraft by ICAO address.
+
+        Only rows that received messages since the previous merge are
+        visited. Regular fields come from whichever source heard the aircraft
+        last; a position is replaced by a newer one, or by a more accurate
+        one (higher NIC) when both are within POSITION_TIE seconds.
+
+        Args:
+            sources: Per-receiver tables
+        """
+        dst_slot = self._slot
+        dst = self._numeric
+        dst_seen = dst["seen"]
+        dst_seen_pos = dst["seen_pos"]
+        dst_nic = dst["nic"]
+        merged: Dict[int, float] = {}
+        messages = 0
+
+        for source in sources:
+            messages += source.messages
+            src = source._numeric
+            src_seen = src["seen"]
+            src_seen_pos = src["seen_pos"]
+            src_nic = src["nic"]
+            src_icao = source._icao
+            src_text = source._text
+            fields = [
+                (src[name], dst[name]) for name in NUMERIC_FIELDS
+                if name not in POSITION_FIELDS
+            ]
+            position = [(src[name], dst[name]) for name in POSITION_FIELDS]
+
+            since = self._merged.get(id(source), 0.0)
+            newest = since
+            changed = compress(range(source._capacity), map(since.__lt__, src_seen))
+            for s in changed:
+                seen = src_seen[s]
+                if seen > newest:
+                    newest = seen
+                d = dst_slot(src_icao[s])
+
+                if not seen < dst_seen[d]:  # also true for a new (NaN) slot
+                    for src_column, dst_column in fields:
+                        value = src_column[s]
+                        if value == value:
+                            dst_column[d] = value
+                    for name, column in src_text.items():
+                        if column[s] is not None:
+                            self._text[name][d] = column[s]
+                    self._on_ground[d] = source._on_ground[s]
+                    self._messages[d] = source._messages[s]
+
+                seen_pos = src_seen_pos[s]
+                if seen_pos != seen_pos:
+                    continue
+                current = dst_seen_pos[d]
+                if current == current:
+                    age = seen_pos - current
+                    if age < -POSITION_TIE:
+                        continue
+                    if age <= POSITION_TIE:
+                        # Close in time: prefer accuracy, then recency
+                        nic, current_nic = src_nic[s], dst_nic[d]
+                        nic = nic if nic == nic else -1
+                        current_nic = current_nic if current_nic == current_nic else -1
+                        if nic < current_nic or (nic == current_nic and age <= 0):
+                            continue
+                for src_column, dst_column in position:
+                    dst_column[d] = src_column[s]
+
+            merged[id(source)] = newest
+
+        self._merged = merged
+        self.messages = messages
+
+    def expire(self, now: Optional[float] = None):
+        """Drop aircraft that have not been heard from within the TTL."""
+        cutoff = (now or time.time()) - self.ttl
+        # NaN (free slot) compares False, so only live stale slots match
+        stale = list(compress(range(self._capacity), map(cutoff.__gt__, self._numeric["seen"])))
+        for slot in stale:
+            self._release(slot)
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Get aircraft counts without materialising any rows."""
+        now = now or time.time()
+        self.expire(now)
+        cutoff = now - self.position_ttl
+        return {
+            "total": len(self._index),
+            "with_position": sum(map(cutoff.__le__, self._numeric["seen_pos"])),
+            "messages": self.messages,
+        }
+
+    def positions_since(self, since: float) -> int:
+        """Count aircraft whose position was updated after the given time."""
+        return sum(map(since.__lt__, self._numeric["seen_pos"]))
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """Get table contents in the aircraft.json format."""
+        now = now or time.time()
+        self.expire(now)
+        position_cutoff = now - self.position_ttl
+        numeric = self._numeric
+
+        aircraft = []
+        for icao, slot in self._index.items():
+            ac: Dict[str, Any] = {"hex": f"{icao:06x}", "messages": self._messages[slot]}
+            for field, column in numeric.items():
+                value = column[slot]
+                if value != value:  # NaN, field never set
+                    continue
+                if field == "seen":
+                    ac["seen"] = round(now - value, 1)
+                elif field == "seen_pos":
+                    if value >= position_cutoff:
+                        ac["seen_pos"] = round(now - value, 1)
+                else:
+                    ac[field] = int(value) if field in INTEGER_FIELDS else value
+            if "seen_pos" not in ac:
+                ac.pop("lat", None)
+                ac.pop("lon", None)
+            if self._on_ground[slot]:
+                ac["alt_baro"] = "ground"
+            for field, column in self._text.items():
+                if column[slot] is not None:
+                    ac[field] = column[slot]
+            aircraft.append(ac)
+
+        return {"now": round(now, 1), "messages": self.messages, "aircraft": aircraft}
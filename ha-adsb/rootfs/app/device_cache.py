@@ -0,0 +1,80 @@
+"""Device Cache - Persists last known good ADS-B receivers across restarts."""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+_LOGGER = logging.getLogger(__name__)
+
+DEVICE_CACHE_PATH = "/data/devices.json"
+MAX_CACHED_DEVICES = 5
+LAST_SEEN_RESOLUTION = 600  # seconds between rewrites for an unchanged device
+
+# Fields that identify how to reach a receiver
+DEVICE_FIELDS = ("host", "port", "endpoint", "type", "transport", "raw_port")
+
+
+class DeviceCache:
+    """Stores fingerprints of receivers that answered recently."""
+
+    def __init__(self, path: str = DEVICE_CACHE_PATH):
+        """Initialize cache and load any persisted devices."""
+        self.path = Path(path)
+        self.devices: List[Dict] = self._load()
+
+    def _load(self) -> List[Dict]:
+        """Load cached devices from disk."""
+        if not self.path.exists():
+            return []
+        try:
+            with open(self.path) as f:
+                devices = json.load(f).get("devices", [])
+            _LOGGER.debug(f"Loaded {len(devices)} cached device(s)")
+            return [d for d in devices if d.get("host") and d.get("port")]
+        except (OSError, ValueError, AttributeError) as e:
+            _LOGGER.warning(f"Ignoring unreadable device cache {self.path}: {e}")
+            return []
+
+    def _save(self):
+        """Write cached devices to disk atomically."""
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"devices": self.devices}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            _LOGGER.warning(f"Failed to persist device cache: {e}")
+
+    def remember(self, device: Dict):
+        """Record a device as last seen now, most recent first."""
+        entry = {key: device[key] for key in DEVICE_FIELDS if key in device}
+        now = int(time.time())
+
+        # Avoid rewriting /data every cycle when nothing but the time moved.
+        # Several receivers are remembered each cycle, so compare with the
+        # device's own entry and leave the order alone when it is unchanged.
+        for cached in self.devices:
+            if (cached["host"], cached["port"]) == (entry["host"], entry["port"]):
+                cached = dict(cached)
+                last_seen = cached.pop("last_seen", 0)
+                if cached == entry and now - last_seen < LAST_SEEN_RESOLUTION:
+                    return
+                break
+
+        entry["last_seen"] = now
+        self.devices = [
+            d for d in self.devices
+            if (d["host"], d["port"]) != (entry["host"], entry["port"])
+        ]
+        self.devices.insert(0, entry)
+        del self.devices[MAX_CACHED_DEVICES:]
+        self._save()
+
+    def candidates(self) -> List[Dict]:
+        """Get cached devices to revalidate, most recently seen first."""
+        return [
+            {key: d[key] for key in DEVICE_FIELDS if key in d}
+            for d in self.devices
+        ]
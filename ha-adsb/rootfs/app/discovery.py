@@ -0,0 +1,311 @@
+"""Discovery Seeds - Finds likely receiver hosts before sweeping the network."""
+import asyncio
+import errno
+import fcntl
+import ipaddress
+import logging
+import random
+import socket
+import struct
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+ARP_TABLE = "/proc/net/arp"
+ARP_FLAG_COMPLETE = 0x2
+
+# Linux interface address ioctls
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+
+# Interface networks wider than this are narrowed around our own address
+MIN_AUTO_PREFIX = 22
+# Configured networks wider than this are refused
+MIN_PREFIX = 16
+
+MDNS_GROUP = "224.0.0.251"
+MDNS_PORT = 5353
+MDNS_TIMEOUT = 0.5  # seconds to collect answers
+
+# DNS-SD service types published by ADS-B software and feeder images
+MDNS_SERVICE_TYPES = (
+    "_piaware._tcp.local",
+    "_dump1090._tcp.local",
+    "_readsb._tcp.local",
+    "_tar1090._tcp.local",
+    "_adsb._tcp.local",
+    "_beast._tcp.local",
+    "_sbs._tcp.local",
+)
+
+DNS_TYPE_A = 1
+DNS_TYPE_PTR = 12
+DNS_CLASS_IN = 1
+DNS_UNICAST_RESPONSE = 0x8000  # QU bit: answer us directly, not the group
+
+
+def arp_hosts(path: str = ARP_TABLE) -> List[str]:
+    """
+    Get IPv4 neighbours the kernel has recently talked to.
+
+    Args:
+        path: ARP table in /proc/net/arp format
+
+    Returns:
+        Addresses of complete entries, in table order
+    """
+    hosts = []
+    try:
+        with open(path) as f:
+            next(f, None)  # header
+            for line in f:
+                fields = line.split()
+                if len(fields) < 4:
+                    continue
+                try:
+                    flags = int(fields[2], 16)
+                except ValueError:
+                    continue
+                if flags & ARP_FLAG_COMPLETE and fields[3] != "00:00:00:00:00:00":
+                    hosts.append(fields[0])
+    except OSError as e:
+        _LOGGER.debug(f"ARP table not available: {e}")
+    return hosts
+
+
+def _interface_ipv4(sock: socket.socket, name: str, request: int) -> Optional[str]:
+    """Read one IPv4 attribute of an interface with an ioctl."""
+    try:
+        ifreq = struct.pack("256s", name.encode()[:15])
+        return socket.inet_ntoa(fcntl.ioctl(sock.fileno(), request, ifreq)[20:24])
+    except OSError as e:
+        if e.errno != errno.EADDRNOTAVAIL:  # anything but an interface without IPv4
+            _LOGGER.debug(f"Cannot read address of interface {name}: {e}")
+        return None
+
+
+def local_networks() -> List[ipaddress.IPv4Network]:
+    """
+    Get the IPv4 networks of this machine's interfaces.
+
+    Loopback and link-local networks are skipped. Very wide networks are
+    narrowed to the /MIN_AUTO_PREFIX around the interface address.
+    """
+    networks = []
+    try:
+        interfaces = socket.if_nameindex()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    except OSError as e:
+        _LOGGER.debug(f"Cannot list network interfaces: {e}")
+        return networks
+
+    with sock:
+        for _, name in interfaces:
+            address = _interface_ipv4(sock, name, SIOCGIFADDR)
+            netmask = _interface_ipv4(sock, name, SIOCGIFNETMASK)
+            if not address or not netmask:
+                continue
+            interface = ipaddress.IPv4Interface(f"{address}/{netmask}")
+            if interface.is_loopback or interface.is_link_local:
+                continue
+            network = interface.network
+            if network.prefixlen < MIN_AUTO_PREFIX:
+                network = ipaddress.IPv4Interface(f"{address}/{MIN_AUTO_PREFIX}").network
+            _LOGGER.debug(f"Interface {name}: {interface} -> scanning {network}")
+            if network not in networks:
+                networks.append(network)
+    return networks
+
+
+def parse_networks(values: Iterable[str], min_prefix: int = 0) -> List[ipaddress.IPv4Network]:
+    """
+    Parse CIDR strings (or single addresses), skipping invalid entries.
+
+    Args:
+        values: Strings like "192.168.1.0/24" or "10.0.0.5"
+        min_prefix: Refuse networks wider than this prefix length
+
+    Returns:
+        Parsed networks
+    """
+    networks = []
+    for value in values:
+        try:
+            network = ipaddress.IPv4Network(str(value).strip(), strict=False)
+        except ValueError:
+            _LOGGER.warning(f"Ignoring invalid network: {value}")
+            continue
+        if network.prefixlen < min_prefix:
+            _LOGGER.warning(f"Ignoring {network}: wider than /{min_prefix}")
+            continue
+        networks.append(network)
+    return networks
+
+
+def iter_hosts(
+    networks: Iterable[ipaddress.IPv4Network],
+    exclude: Iterable[ipaddress.IPv4Network] = (),
+    skip: Iterable[str] = (),
+) -> Iterator[str]:
+    """
+    Lazily yield every host address of the networks.
+
+    Overlapping networks are collapsed so no host is yielded twice.
+
+    Args:
+        networks: Networks to enumerate
+        exclude: Networks whose addresses are left out
+        skip: Individual addresses already probed
+
+    Yields:
+        Host addresses as strings
+    """
+    exclude = list(exclude)
+    skip = set(skip)
+    for network in ipaddress.collapse_addresses(networks):
+        if any(network.subnet_of(excluded) for excluded in exclude):
+            continue
+        partial = [excluded for excluded in exclude if excluded.overlaps(network)]
+        hosts = network.hosts() if network.prefixlen < 31 else iter(network)
+        for address in hosts:
+            if partial and any(address in excluded for excluded in partial):
+                continue
+            host = str(address)
+            if host not in skip:
+                yield host
+
+
+def _encode_name(name: str) -> bytes:
+    """Encode a dotted name as DNS labels."""
+    return b"".join(
+        bytes((len(label),)) + label.encode() for label in name.split(".") if label
+    ) + b"\0"
+
+
+def build_query(service_types: Iterable[str], query_id: int = 0) -> bytes:
+    """Build one DNS-SD PTR query asking for all service types at once."""
+    questions = [
+        _encode_name(name) + struct.pack("!HH", DNS_TYPE_PTR, DNS_CLASS_IN | DNS_UNICAST_RESPONSE)
+        for name in service_types
+    ]
+    header = struct.pack("!HHHHHH", query_id, 0, len(questions), 0, 0, 0)
+    return header + b"".join(questions)
+
+
+def _read_name(packet: bytes, offset: int) -> Tuple[str, int]:
+    """Read a possibly compressed name, returning it and the offset past it."""
+    labels = []
+    end = None
+    for _ in range(128):  # bounds compression loops
+        length = packet[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | packet[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(packet[offset:offset + length].decode("utf-8", "replace"))
+        offset += length
+    return ".".join(labels), end if end is not None else offset
+
+
+def parse_response(packet: bytes, service_types: Set[str]) -> Optional[List[str]]:
+    """
+    Check whether an mDNS response advertises one of our service types.
+
+    Args:
+        packet: Raw DNS message
+        service_types: Lower-case service type names
+
+    Returns:
+        IPv4 addresses from A records (possibly empty) if the response
+        matches, None if it is unrelated or malformed
+    """
+    try:
+        _, flags, qdcount, ancount, nscount, arcount = struct.unpack_from("!HHHHHH", packet)
+        if not flags & 0x8000:
+            return None  # a query, not a response
+        offset = 12
+        for _ in range(qdcount):
+            _, offset = _read_name(packet, offset)
+            offset += 4
+
+        matched = False
+        addresses = []
+        for _ in range(ancount + nscount + arcount):
+            name, offset = _read_name(packet, offset)
+            rtype, _, _, rdlength = struct.unpack_from("!HHIH", packet, offset)
+            offset += 10
+            if rtype == DNS_TYPE_PTR and name.lower() in service_types:
+                matched = True
+            elif rtype == DNS_TYPE_A and rdlength == 4:
+                addresses.append(socket.inet_ntoa(packet[offset:offset + 4]))
+            offset += rdlength
+    except (struct.error, IndexError):
+        return None
+    return addresses if matched else None
+
+
+class _MDNSProtocol(asyncio.DatagramProtocol):
+    """Collects hosts from answers to one mDNS query."""
+
+    def __init__(self, service_types: Set[str]):
+        """Initialize protocol."""
+        self.service_types = service_types
+        self.hosts: List[str] = []
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]):
+        """Record the advertising host."""
+        addresses = parse_response(data, self.service_types)
+        if addresses is None:
+            return
+        for host in addresses or [addr[0]]:
+            if host not in self.hosts:
+                self.hosts.append(host)
+
+
+async def mdns_hosts(
+    service_types: Iterable[str] = MDNS_SERVICE_TYPES,
+    timeout: float = MDNS_TIMEOUT,
+    group: str = MDNS_GROUP,
+    port: int = MDNS_PORT,
+) -> List[str]:
+    """
+    Find hosts advertising ADS-B services over mDNS/DNS-SD.
+
+    Sends a one-shot query from an ephemeral port, so responders answer by
+    unicast and nothing needs to bind port 5353.
+
+    Args:
+        service_types: DNS-SD service types to ask for
+        timeout: Seconds to wait for answers
+        group: Multicast group (or any address answering like a responder)
+        port: Destination port
+
+    Returns:
+        Addresses of advertising hosts, in order of response
+    """
+    service_types = list(service_types)
+    loop = asyncio.get_running_loop()
+    sock = transport = None
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+        sock.setblocking(False)
+        sock.bind(("0.0.0.0", 0))
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: _MDNSProtocol({name.lower() for name in service_types}), sock=sock
+        )
+        transport.sendto(build_query(service_types, random.randint(0, 0xFFFF)), (group, port))
+        await asyncio.sleep(timeout)
+        return protocol.hosts
+    except OSError as e:
+        _LOGGER.debug(f"mDNS query failed: {e}")
+        return []
+    finally:
+        if transport is not None:
+            transport.close()
+        elif sock is not None:
+            sock.close()
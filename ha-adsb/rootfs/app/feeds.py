@@ -0,0 +1,334 @@
+"""Stream Feeds - Persistent readers for raw ADS-B TCP output ports."""
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+from aircraft_table import AircraftTable
+from modes import ModeSDecoder
+
+_LOGGER = logging.getLogger(__name__)
+
+BUFFER_SIZE = 64 * 1024
+CONNECT_TIMEOUT = 5  # seconds
+RECONNECT_DELAY = 5  # seconds
+RECONNECT_DELAY_MAX = 60  # seconds
+
+# Beast binary framing
+BEAST_ESCAPE = 0x1A
+BEAST_MODE_AC = 0x31
+BEAST_MODE_S_SHORT = 0x32
+BEAST_MODE_S_LONG = 0x33
+BEAST_MESSAGE_LENGTHS = {BEAST_MODE_AC: 2, BEAST_MODE_S_SHORT: 7, BEAST_MODE_S_LONG: 14}
+BEAST_HEADER_LENGTH = 9  # escape, type, 6 byte timestamp, signal
+
+# SBS-1 BaseStation MSG field indexes
+SBS_HEX = 4
+SBS_CALLSIGN = 10
+SBS_ALTITUDE = 11
+SBS_GROUND_SPEED = 12
+SBS_TRACK = 13
+SBS_LAT = 14
+SBS_LON = 15
+SBS_VERTICAL_RATE = 16
+SBS_SQUAWK = 17
+SBS_ON_GROUND = 21
+
+# AVR frames prefixed with '@' carry a 48-bit timestamp in hex
+AVR_TIMESTAMP_LENGTH = 12
+
+# Beast signal byte to dBFS, as reported by readsb
+BEAST_RSSI = tuple(
+    round(10 * math.log10((level / 255) ** 2), 1) if level else -49.5
+    for level in range(256)
+)
+
+
+class _FeedProtocol(asyncio.BufferedProtocol):
+    """Receives socket data straight into the feed's buffer."""
+
+    def __init__(self, feed: "StreamFeed"):
+        """Initialize protocol."""
+        self.feed = feed
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Hand asyncio the free tail of the feed buffer."""
+        return self.feed._get_buffer()
+
+    def buffer_updated(self, nbytes: int):
+        """Parse newly received bytes."""
+        self.feed._buffer_updated(nbytes)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        """Wake up the feed's run loop."""
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+
+class StreamFeed:
+    """
+    Persistent TCP feed decoded into an AircraftTable.
+
+    Data is received into one preallocated buffer; subclasses implement
+    `_parse` to consume complete frames in place and return how far they got.
+    """
+
+    name = "stream"
+
+    def __init__(self, host: str, port: int, table: Optional[AircraftTable] = None):
+        """Initialize feed."""
+        self.host = host
+        self.port = port
+        self.table = table if table is not None else AircraftTable()
+        self.connected = False
+        self.bytes_received = 0
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start reading the feed in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop reading the feed."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    def snapshot(self) -> Dict:
+        """Get current aircraft in the aircraft.json format."""
+        return self.table.snapshot()
+
+    async def _run(self):
+        """Connect and keep reconnecting until stopped."""
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_DELAY
+
+        while True:
+            transport = None
+            try:
+                transport, protocol = await asyncio.wait_for(
+                    loop.create_connection(
+                        lambda: _FeedProtocol(self), self.host, self.port
+                    ),
+                    timeout=CONNECT_TIMEOUT
+                )
+                self.connected = True
+                delay = RECONNECT_DELAY
+                _LOGGER.info(f"Connected to {self.name} feed at {self.host}:{self.port}")
+
+                exc = await protocol.closed
+                _LOGGER.warning(f"{self.name} feed disconnected: {exc or 'closed by peer'}")
+            except (asyncio.TimeoutError, OSError) as e:
+                _LOGGER.warning(f"Failed to connect to {self.name} feed at {self.host}:{self.port}: {e}")
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+            finally:
+                self.connected = False
+                self._start = self._end = 0
+                if transport is not None:
+                    transport.close()
+
+            await asyncio.sleep(delay)
+
+    def _get_buffer(self) -> memoryview:
+        """Get writable space at the end of the buffer."""
+        if self._end == len(self._buffer):
+            pending = self._end - self._start
+            if pending == len(self._buffer):
+                # A full buffer without one complete frame is garbage
+                _LOGGER.debug(f"Discarding {pending} unparseable {self.name} bytes")
+                pending = 0
+            else:
+                # Move the trailing partial frame to the front
+                self._buffer[:pending] = bytes(self._view[self._start:self._end])
+            self._start, self._end = 0, pending
+        return self._view[self._end:]
+
+    def _buffer_updated(self, nbytes: int):
+        """Consume complete frames from the buffer."""
+        self._end += nbytes
+        self.bytes_received += nbytes
+        self._start = self._parse(self._start, self._end, time.time())
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _parse(self, start: int, end: int, now: float) -> int:
+        """Parse frames in buffer[start:end], returning the first unconsumed offset."""
+        raise NotImplementedError
+
+
+class BeastFeed(StreamFeed):
+    """Beast binary protocol reader (dump1090/readsb port 30005)."""
+
+    name = "Beast"
+
+    def __init__(self, host: str, port: int, table: Optional[AircraftTable] = None):
+        """Initialize feed."""
+        super().__init__(host, port, table)
+        self.decoder = ModeSDecoder(self.table)
+        self._unescaped = bytearray(BEAST_HEADER_LENGTH + 14)
+
+    def _parse(self, start: int, end: int, now: float) -> int:
+        """Parse Beast frames, handling 0x1A escapes."""
+        buf = self._buffer
+        find = buf.find
+        decode = self.decoder.decode
+        pos = start
+
+        while True:
+            pos = find(BEAST_ESCAPE, pos, end)
+            if pos < 0:
+                return end
+            if pos + 1 >= end:
+                return pos
+
+            msg_len = BEAST_MESSAGE_LENGTHS.get(buf[pos + 1])
+            if msg_len is None:
+                # Stray escape or unsupported frame type, resynchronise
+                pos += 2 if buf[pos + 1] == BEAST_ESCAPE else 1
+                continue
+
+            frame_end = pos + BEAST_HEADER_LENGTH + msg_len
+            if frame_end > end:
+                return pos
+
+            if find(BEAST_ESCAPE, pos + 2, frame_end) < 0:
+                # Fast path: decode straight out of the receive buffer
+                if msg_len != 2:
+                    decode(self._view, pos + BEAST_HEADER_LENGTH, frame_end,
+                           now, BEAST_RSSI[buf[pos + 8]])
+                pos = frame_end
+                continue
+
+            # Slow path: the frame contains escaped 0x1A bytes
+            frame_end = self._unescape(pos, end, msg_len)
+            if frame_end is None:
+                return pos
+            if frame_end < 0:
+                pos = -frame_end
+                continue
+            if msg_len != 2:
+                decode(self._unescaped, BEAST_HEADER_LENGTH,
+                       BEAST_HEADER_LENGTH + msg_len, now, BEAST_RSSI[self._unescaped[8]])
+            pos = frame_end
+
+    def _unescape(self, pos: int, end: int, msg_len: int) -> Optional[int]:
+        """
+        Copy an escaped frame into the scratch buffer.
+
+        Returns:
+            Offset past the frame, None if the frame is incomplete, or the
+            negated offset of a new frame start if this frame was truncated
+        """
+        buf = self._buffer
+        out = self._unescaped
+        out[0], out[1] = buf[pos], buf[pos + 1]
+        want = BEAST_HEADER_LENGTH + msg_len
+        i, n = pos + 2, 2
+        while n < want:
+            if i >= end:
+                return None
+            byte = buf[i]
+            if byte == BEAST_ESCAPE:
+                if i + 1 >= end:
+                    return None
+                if buf[i + 1] != BEAST_ESCAPE:
+                    return -i
+                i += 1
+            out[n] = byte
+            n += 1
+            i += 1
+        return i
+
+
+class SBSFeed(StreamFeed):
+    """SBS-1 BaseStation CSV reader (dump1090/readsb port 30003)."""
+
+    name = "SBS"
+
+    def _parse(self, start: int, end: int, now: float) -> int:
+        """Parse complete MSG lines."""
+        buf = self._buffer
+        find = buf.find
+        pos = start
+
+        while True:
+            newline = find(b"\n", pos, end)
+            if newline < 0:
+                return pos
+            if buf.startswith(b"MSG,", pos, newline):
+                try:
+                    self._apply(buf[pos:newline].decode("ascii").rstrip("\r").split(","), now)
+                except (UnicodeDecodeError, ValueError, IndexError):
+                    pass
+            pos = newline + 1
+
+    def _apply(self, fields, now: float):
+        """Apply one MSG record to the aircraft table."""
+        hex_ident = fields[SBS_HEX]
+        if not hex_ident or hex_ident[0] == "~":
+            return
+        icao = int(hex_ident, 16)
+
+        table = self.table
+        table.messages += 1
+        table.touch(icao, now)
+
+        callsign = fields[SBS_CALLSIGN].strip()
+        if callsign:
+            table.set(icao, "flight", callsign)
+        if fields[SBS_ALTITUDE]:
+            on_ground = len(fields) > SBS_ON_GROUND and fields[SBS_ON_GROUND] == "-1"
+            table.set(icao, "alt_baro", "ground" if on_ground else int(fields[SBS_ALTITUDE]))
+        if fields[SBS_GROUND_SPEED]:
+            table.set(icao, "gs", float(fields[SBS_GROUND_SPEED]))
+        if fields[SBS_TRACK]:
+            table.set(icao, "track", float(fields[SBS_TRACK]))
+        if fields[SBS_LAT] and fields[SBS_LON]:
+            table.set_position(icao, float(fields[SBS_LAT]), float(fields[SBS_LON]), now)
+        if fields[SBS_VERTICAL_RATE]:
+            table.set(icao, "baro_rate", int(fields[SBS_VERTICAL_RATE]))
+        if fields[SBS_SQUAWK]:
+            table.set(icao, "squawk", fields[SBS_SQUAWK])
+
+
+class AVRFeed(StreamFeed):
+    """AVR raw hex reader (dump1090/readsb port 30002)."""
+
+    name = "AVR"
+
+    def __init__(self, host: str, port: int, table: Optional[AircraftTable] = None):
+        """Initialize feed."""
+        super().__init__(host, port, table)
+        self.decoder = ModeSDecoder(self.table)
+
+    def _parse(self, start: int, end: int, now: float) -> int:
+        """Collect every complete frame received so far and decode them as one batch."""
+        last_newline = self._buffer.rfind(b"\n", start, end)
+        if last_newline < 0:
+            return start
+
+        frames = []
+        for line in self._buffer[start:last_newline].decode("ascii", "replace").split():
+            if line[-1:] != ";":
+                continue
+            if line[0] == "*":
+                frames.append(line[1:-1])
+            elif line[0] == "@":
+                # Frame prefixed with a 12 digit MLAT timestamp
+                frames.append(line[AVR_TIMESTAMP_LENGTH + 1:-1])
+
+        if frames:
+            self.decoder.decode_batch(frames, now)
+        return last_newline + 1
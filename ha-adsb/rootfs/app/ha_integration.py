@@ -1,24 +1,180 @@
 """HomeAssistant Integration - Manages entities for ADS-B data."""
 import logging
 import asyncio
+import json
+import re
+import time
 import aiohttp
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Set, Tuple
+
+from aircraft_db import FLAG_INTERESTING, FLAG_MILITARY
+from metrics import HA_POST_DURATION, HA_POSTS
+from rates import RateTracker, summarize_stats
 
 _LOGGER = logging.getLogger(__name__)
 
+# Unchanged entities are re-sent after this long so they never go stale
+STATE_REFRESH_INTERVAL = 300  # seconds
+
+# Concurrent POSTs to the supervisor proxy
+PUBLISH_WORKERS = 4
+PUBLISH_TIMEOUT = 10  # seconds
+FLUSH_TIMEOUT = 5  # seconds to drain pending states on shutdown
+
+
+class StatePublisher:
+    """
+    Posts entity states over one persistent session with a bounded worker pool.
+
+    Only the latest value per entity is kept: if a newer state is submitted
+    before the previous one was sent, the older one is dropped. An entity
+    has at most one POST in flight, so states reach HomeAssistant in order;
+    a value submitted meanwhile is sent once that POST completes.
+    """
+
+    def __init__(
+        self,
+        ha_url: str,
+        headers: Dict[str, str],
+        workers: int = PUBLISH_WORKERS,
+        on_failure: Optional[Callable[[str], None]] = None,
+    ):
+        """Initialize publisher."""
+        self.ha_url = ha_url
+        self.headers = headers
+        self.workers = workers
+        self.on_failure = on_failure
+        self.coalesced = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Set[str] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _start(self):
+        """Create the session and workers inside the running loop."""
+        self._queue = asyncio.Queue()
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=self.workers),
+            timeout=aiohttp.ClientTimeout(total=PUBLISH_TIMEOUT),
+        )
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, entity_id: str, state: str, attributes: Dict[str, Any]):
+        """Queue a state for an entity, replacing any unsent value."""
+        if self._queue is None:
+            self._start()
+        if entity_id in self._pending:
+            self.coalesced += 1
+        elif entity_id not in self._in_flight:
+            # An in-flight entity is queued again by its worker when the POST completes
+            self._queue.put_nowait(entity_id)
+        self._pending[entity_id] = {"state": state, "attributes": attributes}
+
+    async def flush(self):
+        """Wait until every queued state has been sent."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Drain pending states, then stop workers and close the session."""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout=FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"Dropping {len(self._pending)} unsent entity updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._session.close()
+        self._queue = None
+        self._tasks = []
+
+    async def _worker(self):
+        """Send queued states one at a time."""
+        while True:
+            entity_id = await self._queue.get()
+            self._in_flight.add(entity_id)
+            try:
+                payload = self._pending.pop(entity_id)
+                if not await self._post(entity_id, payload) and self.on_failure:
+                    self.on_failure(entity_id)
+            finally:
+                self._in_flight.discard(entity_id)
+                if entity_id in self._pending:
+                    # Submitted while this POST was running; queued before
+                    # task_done() so flush() keeps waiting for it
+                    self._queue.put_nowait(entity_id)
+                self._queue.task_done()
+
+    async def _post(self, entity_id: str, payload: Dict[str, Any]) -> bool:
+        """POST one entity state to HomeAssistant."""
+        started = time.monotonic()
+        outcome = "cancelled"
+        try:
+            url = f"{self.ha_url}/api/states/{entity_id}"
+            async with self._session.post(url, json=payload) as response:
+                outcome = str(response.status)
+                if response.status in [200, 201]:
+                    _LOGGER.debug(f"Updated {entity_id} to {payload['state']}")
+                    return True
+                else:
+                    _LOGGER.error(f"Failed to update {entity_id}: {response.status}")
+                    return False
+        except Exception as e:
+            outcome = "error"
+            _LOGGER.error(f"Error updating entity {entity_id}: {e}")
+            return False
+        finally:
+            HA_POST_DURATION.observe(time.monotonic() - started, entity=entity_id)
+            HA_POSTS.inc(entity=entity_id, outcome=outcome)
+
 
 class HAIntegration:
     """HomeAssistant API integration for ADS-B entities."""
 
-    def __init__(self, supervisor_token: str, ha_url: str = "http://supervisor/core"):
-        """Initialize HA integration."""
-        self.supervisor_token = supervisor_token
-        self.ha_url = ha_url
-        self.headers = {
-            "Authorization": f"Bearer {supervisor_token}",
-            "Content-Type": "application/json",
-        }
+    def __init__(
+        self,
+        supervisor_token: Optional[str],
+        ha_url: str = "http://supervisor/core",
+        refresh_interval: int = STATE_REFRESH_INTERVAL,
+        publisher: Optional[Any] = None,
+    ):
+        """
+        Initialize HA integration.
+
+        Args:
+            supervisor_token: Token for the Home Assistant API, unused with a publisher
+            ha_url: Home Assistant API base URL
+            refresh_interval: Seconds after which unchanged entities are re-sent
+            publisher: Sends entity states instead of a StatePublisher posting
+                to ha_url; it must provide submit(), flush() and close()
+        """
         self.entities_created = False
+        self.refresh_interval = refresh_interval
+        self.skipped_updates = 0
+        self.message_rates = RateTracker()
+        # receiver name -> message rate of that receiver alone
+        self.receiver_rates: Dict[str, RateTracker] = {}
+        # entity_id -> (fingerprint, monotonic time it was queued)
+        self._published: Dict[str, Tuple[int, float]] = {}
+        if publisher is None:
+            headers = {
+                "Authorization": f"Bearer {supervisor_token}",
+                "Content-Type": "application/json",
+            }
+            publisher = StatePublisher(ha_url, headers, on_failure=self._forget_published)
+        self.publisher = publisher
+
+    async def close(self):
+        """Flush pending entity updates and close the publisher."""
+        await self.publisher.close()
+
+    def _forget_published(self, entity_id: str):
+        """Make the next update of an entity go out even if unchanged."""
+        self._published.pop(entity_id, None)
 
     async def create_entities(self):
         """Create/register entities in HomeAssistant."""
@@ -73,33 +229,48 @@ class HAIntegration:
 
         for entity in entities:
             await self._set_state(entity["entity_id"], entity["state"], entity["attributes"])
+        await self.publisher.flush()
 
         self.entities_created = True
         _LOGGER.info("HomeAssistant entities created successfully")
 
+    @staticmethod
+    def _fingerprint(state: str, attributes: Dict[str, Any]) -> int:
+        """Hash a state and its attributes, independent of key order."""
+        return hash((state, json.dumps(attributes, sort_keys=True, default=str)))
+
     async def _set_state(self, entity_id: str, state: str, attributes: Dict[str, Any]) -> bool:
-        """Set entity state in HomeAssistant."""
-        try:
-            url = f"{self.ha_url}/api/states/{entity_id}"
-            payload = {
-                "state": state,
-                "attributes": attributes
-            }
+        """
+        Queue an entity state for HomeAssistant, skipping unchanged writes.
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=self.headers, json=payload) as response:
-                    if response.status in [200, 201]:
-                        _LOGGER.debug(f"Updated {entity_id} to {state}")
-                        return True
-                    else:
-                        _LOGGER.error(f"Failed to update {entity_id}: {response.status}")
-                        return False
-        except Exception as e:
-            _LOGGER.error(f"Error updating entity {entity_id}: {e}")
-            return False
+        Returns:
+            True if the state was queued or is already current
+        """
+        fingerprint = self._fingerprint(state, attributes)
+        now = time.monotonic()
+        published = self._published.get(entity_id)
+        if published and published[0] == fingerprint and now - published[1] < self.refresh_interval:
+            self.skipped_updates += 1
+            return True
+
+        self._published[entity_id] = (fingerprint, now)
+        self.publisher.submit(entity_id, state, attributes)
+        return True
 
-    async def update_receiver_status(self, online: bool, device_info: Optional[Dict] = None):
-        """Update receiver online/offline status."""
+    async def update_receiver_status(
+        self,
+        online: bool,
+        device_info: Optional[Dict] = None,
+        devices: Optional[List[Dict]] = None,
+    ):
+        """
+        Update receiver online/offline status.
+
+        Args:
+            online: Whether any receiver is available
+            device_info: Primary receiver
+            devices: Every receiver in use, if there are several
+        """
         state = "on" if online else "off"
         attributes = {
             "friendly_name": "ADS-B Receiver Status",
@@ -111,6 +282,8 @@ class HAIntegration:
             attributes["device_type"] = device_info.get("type", "unknown")
             attributes["host"] = device_info.get("host", "unknown")
             attributes["port"] = device_info.get("port", 0)
+        if devices and len(devices) > 1:
+            attributes["receivers"] = [f"{device['host']}:{device['port']}" for device in devices]
 
         await self._set_state("binary_sensor.adsb_receiver", state, attributes)
 
@@ -129,8 +302,16 @@ class HAIntegration:
                 {"friendly_name": "Receiver Type", "icon": "mdi:chip"}
             )
 
-    async def update_aircraft_data(self, aircraft_data: Optional[Dict]):
-        """Update aircraft statistics from ADS-B data."""
+    async def update_aircraft_data(
+        self, aircraft_data: Optional[Dict], summary: Optional[Dict] = None
+    ):
+        """
+        Update aircraft statistics from ADS-B data.
+
+        Args:
+            aircraft_data: Parsed aircraft.json, or None if unavailable
+            summary: Precomputed counts from AircraftTable.summary()
+        """
         if not aircraft_data:
             await self._set_state(
                 "sensor.adsb_aircraft_count",
@@ -154,17 +335,32 @@ class HAIntegration:
 
         # Extract aircraft count
         aircraft_count = 0
-        if "aircraft" in aircraft_data:
+        total_aircraft = len(aircraft_data.get("aircraft", []))
+        if summary:
+            aircraft_count = summary["with_position"]
+            total_aircraft = summary["total"]
+        elif "aircraft" in aircraft_data:
             # Count only aircraft with position
             aircraft_count = sum(
                 1 for ac in aircraft_data["aircraft"]
                 if "lat" in ac and "lon" in ac
             )
 
-        # Extract message rate (if available)
-        message_rate = 0
+        # Counts by aircraft database flags, when aircraft were enriched
+        flagged = {}
+        for ac in aircraft_data.get("aircraft", ()):
+            flags = ac.get("dbFlags")
+            if flags is not None:
+                flagged["military"] = flagged.get("military", 0) + bool(flags & FLAG_MILITARY)
+                flagged["interesting"] = flagged.get("interesting", 0) + bool(flags & FLAG_INTERESTING)
+
+        # The receiver reports a cumulative counter, derive msg/s from it
         if "messages" in aircraft_data:
-            message_rate = aircraft_data.get("messages", 0)
+            self.message_rates.add(
+                aircraft_data.get("now") or time.time(), aircraft_data["messages"]
+            )
+        rates = self.message_rates.rates()
+        message_rate = rates["10s"]
 
         # Update entities
         await self._set_state(
@@ -174,7 +370,8 @@ class HAIntegration:
                 "friendly_name": "Visible Aircraft",
                 "unit_of_measurement": "aircraft",
                 "icon": "mdi:airplane-clock",
-                "total_aircraft": len(aircraft_data.get("aircraft", []))
+                "total_aircraft": total_aircraft,
+                **flagged,
             }
         )
 
@@ -184,6 +381,79 @@ class HAIntegration:
             {
                 "friendly_name": "Message Rate",
                 "unit_of_measurement": "msg/s",
-                "icon": "mdi:radio-tower"
+                "icon": "mdi:radio-tower",
+                "instant": rates["instant"],
+                "rate_1m": rates["1m"],
+                "rate_5m": rates["5m"],
+                "counter_resets": self.message_rates.resets,
             }
         )
+
+    async def update_receiver_stats(self, stats: Optional[Dict]):
+        """Update signal and message quality sensors from stats.json."""
+        summary = summarize_stats(stats) if stats else None
+        if not summary or "signal" not in summary:
+            return
+
+        attributes = {
+            "friendly_name": "Receiver Signal Level",
+            "unit_of_measurement": "dBFS",
+            "icon": "mdi:signal",
+        }
+        for key in ("peak_signal", "strong_signals", "quality", "accepted", "bad",
+                    "unknown_icao", "message_rate"):
+            if key in summary:
+                attributes[key] = summary[key]
+        await self._set_state("sensor.adsb_signal_level", str(summary["signal"]), attributes)
+
+        if "noise" in summary:
+            await self._set_state(
+                "sensor.adsb_noise_level",
+                str(summary["noise"]),
+                {
+                    "friendly_name": "Receiver Noise Level",
+                    "unit_of_measurement": "dBFS",
+                    "icon": "mdi:waveform",
+                }
+            )
+
+    @staticmethod
+    def _receiver_slug(name: str) -> str:
+        """Turn a receiver's host:port into an entity id fragment."""
+        return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+    async def update_receivers(self, receivers: Dict[str, Dict]):
+        """
+        Update per-receiver sensors alongside the combined ones.
+
+        Args:
+            receivers: Receiver name -> summary from ADSBScanner.receiver_summaries()
+        """
+        now = time.time()
+        for name, summary in receivers.items():
+            slug = self._receiver_slug(name)
+            rates = self.receiver_rates.setdefault(name, RateTracker())
+            if summary["online"]:
+                rates.add(now, summary["messages"])
+
+            await self._set_state(
+                f"sensor.adsb_{slug}_aircraft_count",
+                str(summary["with_position"] if summary["online"] else 0),
+                {
+                    "friendly_name": f"Visible Aircraft ({name})",
+                    "unit_of_measurement": "aircraft",
+                    "icon": "mdi:airplane-clock",
+                    "total_aircraft": summary["total"],
+                    "receiver_type": summary["type"],
+                    "online": summary["online"],
+                }
+            )
+            await self._set_state(
+                f"sensor.adsb_{slug}_message_rate",
+                str(round(rates.rate(10), 1) if summary["online"] else 0),
+                {
+                    "friendly_name": f"Message Rate ({name})",
+                    "unit_of_measurement": "msg/s",
+                    "icon": "mdi:radio-tower",
+                }
+            )
@@ -3,15 +3,38 @@ import asyncio
 import logging
 import os
 import json
+import signal
 import sys
+import time
 from pathlib import Path
+from typing import Optional, Dict, List
 
+from acquisition import AircraftAcquisition
+from aircraft_db import AircraftDB
+from device_cache import DeviceCache
 from scanner import ADSBScanner
+from scheduler import PollScheduler
 from ha_integration import HAIntegration
+from mqtt_integration import MQTTIntegration, MQTTPublisher, supervisor_mqtt_service
+from metrics import (
+    AIRCRAFT,
+    AIRCRAFT_WITH_POSITION,
+    LOOP_LAG,
+    MESSAGES,
+    METRICS_PORT,
+    MetricsServer,
+)
+from nginx_config import NginxConfig
 from tar1090_updater import Tar1090Updater
 
 _LOGGER = logging.getLogger(__name__)
 
+# Backoff between full network sweeps while no receiver answers
+SWEEP_BACKOFF_MAX = 1800  # seconds
+
+# readsb/dump1090 rewrite stats.json about once a minute
+STATS_INTERVAL = 60  # seconds
+
 
 class ADSBService:
     """Main ADS-B Dashboard service."""
@@ -19,10 +42,40 @@ class ADSBService:
     def __init__(self):
         """Initialize service."""
         self.config = self._load_config()
-        self.scanner = ADSBScanner(timeout=2)
+        self.scanner = ADSBScanner(
+            timeout=2,
+            concurrency=self.config.get("scan_concurrency", 256),
+            probe_rate=self.config.get("scan_probe_rate", 1000),
+            aircraft_ttl=self.config.get("aircraft_ttl", 300),
+            networks=self.config.get("scan_networks", []),
+            exclude=self.config.get("scan_exclude", []),
+        )
+        self.aircraft_db = AircraftDB()
+        self.acquisition = AircraftAcquisition(
+            self.scanner,
+            PollScheduler(
+                min_interval=self.config.get("poll_interval_min", 1),
+                max_interval=self.config.get("poll_interval_max", 60),
+            ),
+            self.aircraft_db,
+        )
         self.ha_integration = None
         self.tar1090_updater = Tar1090Updater()
+        self.device_cache = DeviceCache()
+        self.max_receivers = self.config.get("max_receivers", 1)
+        self.metrics_server = (
+            MetricsServer() if self.config.get("metrics", True) else None
+        )
+        self.nginx_config = NginxConfig(
+            cache_size=self.config.get("proxy_cache_size", 10),
+            cache_ttl=self.config.get("proxy_cache_ttl", 1),
+            metrics_port=METRICS_PORT if self.metrics_server else None,
+        )
         self.running = False
+        self._sweep_backoff = 0
+        self._next_sweep_at = 0.0
+        self._next_stats_at = 0.0
+        self._update_task: Optional[asyncio.Task] = None
 
         # Setup logging
         log_level = self.config.get("log_level", "info").upper()
@@ -44,111 +97,112 @@ class ADSBService:
         """Setup service components."""
         _LOGGER.info("Starting ADS-B Dashboard service...")
 
+        # Let the proxy start right away, even if setup fails below; it is
+        # reloaded once a device is found
+        self._write_nginx_config()
+
         # Get supervisor token
         supervisor_token = os.getenv("SUPERVISOR_TOKEN")
         if not supervisor_token:
             _LOGGER.error("SUPERVISOR_TOKEN not found!")
             return False
 
+        if self.metrics_server:
+            await self.metrics_server.start()
+
         # Initialize HA integration
-        self.ha_integration = HAIntegration(supervisor_token)
+        self.ha_integration = await self._create_integration(supervisor_token)
         await self.ha_integration.create_entities()
 
-        # Update tar1090 if enabled
-        if self.config.get("update_tar1090", True):
-            _LOGGER.info("Updating tar1090...")
-            success = await self.tar1090_updater.update()
-            if not success:
-                _LOGGER.warning("tar1090 update failed, but continuing...")
+        # Consumers of every aircraft snapshot
+        self.acquisition.subscribe(self._publish_aircraft_data)
+        self.acquisition.subscribe(self._update_receiver_stats)
+        self.acquisition.subscribe(self._publish_receivers)
+        self.acquisition.subscribe(self._update_metrics)
+
+        # Update tar1090 in the background while the installed version is served
+        # The last built aircraft database index is usable right away
+        self.aircraft_db.open()
 
-        # Verify tar1090 is installed
-        if not self.tar1090_updater.is_installed():
+        if self.config.get("update_tar1090", True):
+            self._update_task = asyncio.create_task(self._update_tar1090())
+            if not self.tar1090_updater.is_installed():
+                _LOGGER.info("Dashboard will be available once tar1090 is downloaded")
+        elif not self.tar1090_updater.is_installed():
             _LOGGER.error("tar1090 is not installed!")
             return False
-
-        # Write nginx config with tar1090 location
-        self._write_nginx_config()
+        else:
+            self._update_task = asyncio.create_task(self._refresh_aircraft_db())
 
         _LOGGER.info("Service setup complete")
         return True
 
+    async def _create_integration(self, supervisor_token: str) -> HAIntegration:
+        """Create the entity publisher for the configured output mode."""
+        refresh_interval = self.config.get("state_refresh_interval", 300)
+        if self.config.get("output_mode", "rest") == "mqtt":
+            publisher = await self._mqtt_publisher(supervisor_token)
+            if publisher:
+                _LOGGER.info(f"Publishing entities over MQTT via {publisher.host}:{publisher.port}")
+                return MQTTIntegration(publisher, refresh_interval=refresh_interval)
+            _LOGGER.warning("MQTT output not available, using the REST API")
+        return HAIntegration(supervisor_token, refresh_interval=refresh_interval)
+
+    async def _mqtt_publisher(self, supervisor_token: str) -> Optional[MQTTPublisher]:
+        """Create a publisher for the configured broker, or the one the Supervisor provides."""
+        if not MQTTPublisher.available():
+            _LOGGER.error("MQTT client library is not installed")
+            return None
+
+        if self.config.get("mqtt_host"):
+            broker = {
+                "host": self.config["mqtt_host"],
+                "port": self.config.get("mqtt_port", 1883),
+                "username": self.config.get("mqtt_username", ""),
+                "password": self.config.get("mqtt_password", ""),
+            }
+        else:
+            broker = await supervisor_mqtt_service(supervisor_token)
+            if not broker:
+                _LOGGER.error("No MQTT broker configured and none provided by the Supervisor")
+                return None
+
+        return MQTTPublisher(
+            broker["host"],
+            broker.get("port", 1883),
+            username=broker.get("username"),
+            password=broker.get("password"),
+            use_tls=bool(broker.get("ssl")),
+        )
+
+    async def _update_tar1090(self):
+        """Update tar1090; the new version goes live without restarting nginx."""
+        _LOGGER.info("Updating tar1090...")
+        if not await self.tar1090_updater.update():
+            _LOGGER.warning("tar1090 update failed, but continuing...")
+        await self._refresh_aircraft_db()
+
+    async def _refresh_aircraft_db(self):
+        """Bring the aircraft database index up to date with the installed tar1090."""
+        db_dir = str(Path(self.tar1090_updater.get_html_dir()) / "db")
+        loop = asyncio.get_running_loop()
+        try:
+            rebuilt = await loop.run_in_executor(None, self.aircraft_db.rebuild, db_dir)
+        except OSError as e:
+            _LOGGER.error(f"Failed to build aircraft database index: {e}")
+            return
+        if rebuilt or not self.aircraft_db.count:
+            if self.aircraft_db.open():
+                _LOGGER.info(f"Aircraft database: {self.aircraft_db.count} aircraft")
+
     def _write_nginx_config(self):
-        """Write nginx configuration for tar1090 and proxy."""
-        html_dir = self.tar1090_updater.get_html_dir()
-
-        # Determine device proxy configuration
-        proxy_config = ""
-        if hasattr(self.scanner, 'detected_device') and self.scanner.detected_device:
-            device = self.scanner.detected_device
-            proxy_url = f"http://{device['host']}:{device['port']}"
-
-            proxy_config = f"""
-        # Proxy to ADS-B device
-        location /data/ {{
-            proxy_pass {proxy_url}/data/;
-            proxy_http_version 1.1;
-            proxy_set_header Upgrade $http_upgrade;
-            proxy_set_header Connection "upgrade";
-            proxy_set_header Host $host;
-            proxy_cache_bypass $http_upgrade;
-        }}
-"""
-
-        nginx_config = f"""
-daemon off;
-error_log /var/log/nginx/error.log warn;
-pid /run/nginx/nginx.pid;
-
-events {{
-    worker_connections 1024;
-}}
-
-http {{
-    include /etc/nginx/mime.types;
-    default_type application/octet-stream;
-
-    access_log /var/log/nginx/access.log;
-
-    sendfile on;
-    keepalive_timeout 65;
-    gzip on;
-
-    server {{
-        listen 8080;
-        server_name _;
-
-        root {html_dir};
-        index index.html;
-
-        # Serve tar1090 static files
-        location / {{
-            try_files $uri $uri/ /index.html;
-            add_header Cache-Control "public, max-age=3600";
-        }}
-
-        # Disable caching for data files
-        location ~ \\.(json|geojson)$ {{
-            add_header Cache-Control "no-cache, no-store, must-revalidate";
-            add_header Pragma "no-cache";
-            add_header Expires 0;
-        }}
-{proxy_config}
-        # Health check
-        location /health {{
-            access_log off;
-            return 200 "OK";
-            add_header Content-Type text/plain;
-        }}
-    }}
-}}
-"""
-
-        config_path = Path("/etc/nginx/nginx.conf")
-        config_path.write_text(nginx_config)
-        _LOGGER.info("Nginx configuration written")
+        """Write nginx configuration for tar1090 and proxy if it changed."""
+        self.nginx_config.apply(
+            self.tar1090_updater.get_html_dir(), self.scanner.detected_device
+        )
 
     async def scan_loop(self):
-        """Main scanning loop."""
+        """Supervise receiver discovery; aircraft data is fetched by acquisition."""
         scan_interval = self.config.get("scan_interval", 30)
         auto_detect = self.config.get("auto_detect", True)
         manual_host = self.config.get("manual_host", "")
@@ -168,44 +222,113 @@ http {{
                     }
                     self.scanner.detected_device = device_info
                 elif auto_detect:
-                    _LOGGER.info("Scanning network for ADS-B devices...")
-                    device_info = await self.scanner.scan_network()
+                    await self._discover_devices(scan_interval)
+                    device_info = self.scanner.detected_device
                 else:
                     device_info = None
 
+                self.acquisition.device_changed()
+
                 # Update HA entities
                 if device_info:
-                    await self.ha_integration.update_receiver_status(True, device_info)
-
-                    # Update nginx config with new device
-                    self._write_nginx_config()
-
-                    # Get aircraft data
-                    aircraft_data = await self.scanner.get_aircraft_data()
-                    await self.ha_integration.update_aircraft_data(aircraft_data)
+                    await self.ha_integration.update_receiver_status(
+                        True, device_info, self.scanner.detected_devices
+                    )
                 else:
                     await self.ha_integration.update_receiver_status(False)
-                    await self.ha_integration.update_aircraft_data(None)
+
+                # Point the proxy at the current device
+                self._write_nginx_config()
 
             except Exception as e:
                 _LOGGER.error(f"Error in scan loop: {e}", exc_info=True)
 
             # Wait before next scan
+            due = time.monotonic() + scan_interval
             await asyncio.sleep(scan_interval)
+            LOOP_LAG.observe(max(0.0, time.monotonic() - due), loop="scan")
+
+    async def _discover_devices(self, scan_interval: int) -> List[Dict]:
+        """Revalidate known devices, sweeping the network for any that are missing."""
+        limit = self.max_receivers
+        candidates = {}
+        for candidate in self.scanner.detected_devices + self.device_cache.candidates():
+            candidates.setdefault((candidate["host"], candidate["port"]), candidate)
+
+        devices = []
+        for key, candidate in candidates.items():
+            if len(devices) >= limit:
+                break
+            device_info = await self.scanner.revalidate(candidate)
+            if device_info:
+                _LOGGER.debug(f"Known device still reachable: {key[0]}:{key[1]}")
+                self.device_cache.remember(device_info)
+                devices.append(device_info)
+
+        if len(devices) >= limit:
+            self._sweep_backoff = 0
+            self.scanner.detected_devices = devices
+            return devices
+
+        # Receivers are missing, sweep with exponential backoff
+        now = time.monotonic()
+        if now < self._next_sweep_at:
+            _LOGGER.debug(
+                f"Next network sweep in {self._next_sweep_at - now:.0f}s"
+            )
+            self.scanner.detected_devices = devices
+            return devices
+
+        _LOGGER.info("Scanning network for ADS-B devices...")
+        known = {(device["host"], device["port"]) for device in devices}
+        found = [
+            device for device in await self.scanner.scan_network(limit=limit)
+            if (device["host"], device["port"]) not in known
+        ]
+        for device_info in found:
+            self.device_cache.remember(device_info)
+        devices.extend(found[:limit - len(devices)])
+
+        if found:
+            self._sweep_backoff = 0
+        else:
+            self._sweep_backoff = min(
+                max(scan_interval, self._sweep_backoff * 2), SWEEP_BACKOFF_MAX
+            )
+            self._next_sweep_at = time.monotonic() + self._sweep_backoff
+            _LOGGER.info(f"No new receiver found, next sweep in {self._sweep_backoff}s")
 
-    async def update_loop(self):
-        """Update aircraft data more frequently."""
-        while self.running:
-            try:
-                if self.scanner.detected_device:
-                    aircraft_data = await self.scanner.get_aircraft_data()
-                    if aircraft_data:
-                        await self.ha_integration.update_aircraft_data(aircraft_data)
-            except Exception as e:
-                _LOGGER.error(f"Error updating aircraft data: {e}")
+        self.scanner.detected_devices = devices
+        return devices
+
+    async def _publish_aircraft_data(self, aircraft_data: Optional[Dict], summary: Dict):
+        """Publish aircraft sensors for a snapshot."""
+        await self.ha_integration.update_aircraft_data(
+            aircraft_data, summary if aircraft_data else None
+        )
 
-            # Update every 5 seconds
-            await asyncio.sleep(5)
+    async def _publish_receivers(self, aircraft_data: Optional[Dict], summary: Dict):
+        """Publish per-receiver sensors when several receivers are polled."""
+        if len(self.scanner.receivers) > 1:
+            await self.ha_integration.update_receivers(self.scanner.receiver_summaries())
+
+    async def _update_metrics(self, aircraft_data: Optional[Dict], summary: Dict):
+        """Update the aircraft gauges."""
+        AIRCRAFT.set(summary["total"])
+        AIRCRAFT_WITH_POSITION.set(summary["with_position"])
+        if aircraft_data and "messages" in aircraft_data:
+            MESSAGES.set(aircraft_data["messages"])
+
+    async def _update_receiver_stats(self, aircraft_data: Optional[Dict], summary: Dict):
+        """Publish stats.json metrics once per stats period."""
+        if not aircraft_data or not self.config.get("receiver_stats", True):
+            return
+        now = time.monotonic()
+        if now < self._next_stats_at:
+            return
+        self._next_stats_at = now + STATS_INTERVAL
+        stats = await self.scanner.get_receiver_stats()
+        await self.ha_integration.update_receiver_stats(stats)
 
     async def run(self):
         """Run the service."""
@@ -215,27 +338,47 @@ http {{
 
         self.running = True
 
-        # Start both loops
+        # Discovery and data acquisition run as independent tasks
         try:
             await asyncio.gather(
                 self.scan_loop(),
-                self.update_loop()
+                self.acquisition.run()
             )
         except asyncio.CancelledError:
             _LOGGER.info("Service cancelled")
         finally:
             self.running = False
+            await self._close()
 
     async def stop(self):
         """Stop the service."""
         _LOGGER.info("Stopping service...")
         self.running = False
+        self.acquisition.stop()
+        await self._close()
+
+    async def _close(self):
+        """Release network resources."""
+        if self._update_task and not self._update_task.done():
+            self._update_task.cancel()
+        await self.scanner.close()
+        self.aircraft_db.close()
+        if self.ha_integration:
+            await self.ha_integration.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
 
 
 async def main():
     """Main entry point."""
     service = ADSBService()
 
+    # Cancel the service on container shutdown so sessions close cleanly
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, main_task.cancel)
+
     try:
         await service.run()
     except KeyboardInterrupt:
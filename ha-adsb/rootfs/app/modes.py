@@ -0,0 +1,318 @@
+"""Mode S Decoder - Decodes Mode S / ADS-B messages into an AircraftTable."""
+import math
+from typing import Dict, List, Optional, Tuple
+
+from aircraft_table import AircraftTable
+
+# CRC-24 generator polynomial used by Mode S parity
+CRC24_POLY = 0xFFF409
+
+
+def _build_crc_table():
+    """Precompute the byte-wise CRC-24 lookup table."""
+    table = []
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc = (crc << 1) ^ CRC24_POLY if crc & 0x800000 else crc << 1
+        table.append(crc & 0xFFFFFF)
+    return tuple(table)
+
+
+CRC24_TABLE = _build_crc_table()
+
+CALLSIGN_CHARSET = (
+    "#ABCDEFGHIJKLMNOPQRSTUVWXYZ##### ###############0123456789######"
+)
+
+# Even/odd CPR frames further apart than this cannot be paired
+CPR_PAIR_MAX_AGE = 10  # seconds
+
+SHORT_MSG_BITS = 56
+LONG_MSG_BITS = 112
+
+
+def crc24(data, start: int = 0, end: Optional[int] = None) -> int:
+    """Compute the Mode S CRC-24 remainder of data[start:end]."""
+    crc = 0
+    table = CRC24_TABLE
+    for i in range(start, len(data) if end is None else end):
+        crc = ((crc << 8) & 0xFFFFFF) ^ table[((crc >> 16) ^ data[i]) & 0xFF]
+    return crc
+
+
+def _fromhex_or_zero(frame: str, size: int) -> bytes:
+    """Convert a hex frame, substituting zeros (DF0, rejected) if malformed."""
+    try:
+        return bytes.fromhex(frame)
+    except ValueError:
+        return bytes(size)
+
+
+def decode_ac13(ac: int) -> Optional[int]:
+    """Decode a 13-bit altitude code (DF0/4/16/20) in feet."""
+    if ac & 0x40:  # M bit, metric altitude
+        return None
+    if ac & 0x10:  # Q bit, 25 ft increments
+        n = ((ac & 0x1F80) >> 2) | ((ac & 0x20) >> 1) | (ac & 0x0F)
+        return n * 25 - 1000
+    return None
+
+
+def decode_ac12(ac: int) -> Optional[int]:
+    """Decode a 12-bit altitude code (ADS-B airborne position) in feet."""
+    if ac & 0x10:  # Q bit, 25 ft increments
+        n = ((ac & 0xFE0) >> 1) | (ac & 0x0F)
+        return n * 25 - 1000
+    return None
+
+
+def decode_id13(id13: int) -> str:
+    """Decode a 13-bit identity code (DF5/21) into a squawk string."""
+    def bit(n):
+        return (id13 >> (12 - n)) & 1
+
+    a = bit(5) * 4 + bit(3) * 2 + bit(1)
+    b = bit(11) * 4 + bit(9) * 2 + bit(7)
+    c = bit(4) * 4 + bit(2) * 2 + bit(0)
+    d = bit(12) * 4 + bit(10) * 2 + bit(8)
+    return f"{a}{b}{c}{d}"
+
+
+def cpr_nl(lat: float) -> int:
+    """Number of longitude zones for a latitude."""
+    lat = abs(lat)
+    if lat == 0:
+        return 59
+    if lat >= 87:
+        return 2 if lat == 87 else 1
+    a = 1 - math.cos(math.pi / 30)
+    b = math.cos(math.pi / 180 * lat) ** 2
+    return int(math.floor(2 * math.pi / math.acos(1 - a / b)))
+
+
+def cpr_global(
+    even: Tuple[int, int], odd: Tuple[int, int], odd_is_newest: bool
+) -> Optional[Tuple[float, float]]:
+    """Globally decode an airborne CPR position from an even/odd pair."""
+    lat_e, lon_e = even[0] / 131072, even[1] / 131072
+    lat_o, lon_o = odd[0] / 131072, odd[1] / 131072
+
+    j = math.floor(59 * lat_e - 60 * lat_o + 0.5)
+    rlat_e = 360 / 60 * (j % 60 + lat_e)
+    rlat_o = 360 / 59 * (j % 59 + lat_o)
+    if rlat_e >= 270:
+        rlat_e -= 360
+    if rlat_o >= 270:
+        rlat_o -= 360
+
+    nl = cpr_nl(rlat_e)
+    if nl != cpr_nl(rlat_o):
+        return None
+
+    m = math.floor(lon_e * (nl - 1) - lon_o * nl + 0.5)
+    if odd_is_newest:
+        lat, ni, cpr_lon = rlat_o, max(nl - 1, 1), lon_o
+    else:
+        lat, ni, cpr_lon = rlat_e, max(nl, 1), lon_e
+    lon = 360 / ni * (m % ni + cpr_lon)
+    if lon >= 180:
+        lon -= 360
+    return round(lat, 6), round(lon, 6)
+
+
+class ModeSDecoder:
+    """Decodes raw Mode S frames and applies them to an AircraftTable."""
+
+    def __init__(self, table: AircraftTable):
+        """Initialize decoder."""
+        self.table = table
+        self.crc_errors = 0
+        # icao -> [even (lat, lon, t), odd (lat, lon, t)]
+        self._cpr: Dict[int, list] = {}
+        self._next_cpr_prune = 0.0
+
+    def decode(self, data, start: int, end: int, now: float, rssi: Optional[float] = None) -> bool:
+        """
+        Decode one Mode S frame held in data[start:end].
+
+        Args:
+            data: Buffer (bytes, bytearray or memoryview) holding the frame
+            start: Offset of the first message byte
+            end: Offset just past the last message byte
+            now: Receive time (epoch seconds)
+            rssi: Signal level in dBFS, if known
+
+        Returns:
+            True if the frame was accepted
+        """
+        length = end - start
+        if length == 14:
+            bits = LONG_MSG_BITS
+        elif length == 7:
+            bits = SHORT_MSG_BITS
+        else:
+            return False
+
+        msg = int.from_bytes(data[start:end], "big")
+        df = msg >> (bits - 5)
+        parity = msg & 0xFFFFFF
+        remainder = crc24(data, start, end - 3)
+        table = self.table
+
+        if df == 17 or (df == 18 and (msg >> (bits - 8)) & 0x7 == 0):
+            if remainder != parity or bits != LONG_MSG_BITS:
+                self.crc_errors += 1
+                return False
+            icao = (msg >> 80) & 0xFFFFFF
+            table.messages += 1
+            table.touch(icao, now, rssi)
+            self._decode_extended_squitter(icao, (msg >> 24) & 0xFFFFFFFFFFFFFF, now)
+            return True
+
+        if df == 11:
+            # Interrogator identifier is XORed into the parity, allow II/SI codes
+            if (remainder ^ parity) & 0xFFFF80:
+                self.crc_errors += 1
+                return False
+            icao = (msg >> 24) & 0xFFFFFF
+            table.messages += 1
+            table.touch(icao, now, rssi)
+            return True
+
+        if df in (0, 4, 5, 16, 20, 21):
+            # Address/Parity: the recovered address is only trusted once the
+            # aircraft has been seen with a cleartext address (DF11/17/18)
+            icao = remainder ^ parity
+            if not table.known(icao):
+                return False
+            table.messages += 1
+            table.touch(icao, now, rssi)
+            field13 = (msg >> (bits - 32)) & 0x1FFF
+            if df in (5, 21):
+                table.set(icao, "squawk", decode_id13(field13))
+            else:
+                alt = decode_ac13(field13)
+                if alt is not None:
+                    table.set(icao, "alt_baro", alt)
+            return True
+
+        return False
+
+    def decode_batch(self, frames: List[str], now: float, rssi: Optional[float] = None) -> int:
+        """
+        Decode a batch of hex-encoded frames.
+
+        Frames of the same length are converted from hex in one call and
+        decoded from a shared buffer.
+
+        Args:
+            frames: Hex strings of 7 or 14 byte Mode S frames
+            now: Receive time (epoch seconds)
+            rssi: Signal level in dBFS, if known
+
+        Returns:
+            Number of frames accepted
+        """
+        accepted = 0
+        decode = self.decode
+        for hex_len in (LONG_MSG_BITS // 4, SHORT_MSG_BITS // 4):
+            group = [frame for frame in frames if len(frame) == hex_len]
+            if not group:
+                continue
+            try:
+                data = bytes.fromhex("".join(group))
+            except ValueError:
+                # One bad frame spoils the join, fall back per frame
+                data = b"".join(_fromhex_or_zero(frame, hex_len // 2) for frame in group)
+            size = hex_len // 2
+            for start in range(0, len(data), size):
+                accepted += decode(data, start, start + size, now, rssi)
+        return accepted
+
+    def _decode_extended_squitter(self, icao: int, me: int, now: float):
+        """Decode the 56-bit ME field of an extended squitter."""
+        table = self.table
+        tc = me >> 51
+
+        if 1 <= tc <= 4:
+            chars = "".join(
+                CALLSIGN_CHARSET[(me >> shift) & 0x3F] for shift in range(42, -1, -6)
+            )
+            table.set(icao, "flight", chars.replace("#", "").rstrip())
+            table.set(icao, "category", f"{'DCBA'[tc - 1]}{(me >> 48) & 0x7}")
+
+        elif 5 <= tc <= 8:
+            table.set(icao, "alt_baro", "ground")
+
+        elif 9 <= tc <= 18 or 20 <= tc <= 22:
+            ac12 = (me >> 36) & 0xFFF
+            if tc <= 18:
+                alt = decode_ac12(ac12)
+                if alt is not None:
+                    table.set(icao, "alt_baro", alt)
+            elif ac12:
+                table.set(icao, "alt_geom", int(ac12 * 3.28084))
+            self._decode_cpr(
+                icao, (me >> 34) & 1, (me >> 17) & 0x1FFFF, me & 0x1FFFF, now
+            )
+
+        elif tc == 19:
+            self._decode_velocity(icao, me)
+
+    def _decode_cpr(self, icao: int, odd: int, lat: int, lon: int, now: float):
+        """Store a CPR frame and decode a position once a pair is available."""
+        if now >= self._next_cpr_prune:
+            self._prune_cpr(now)
+        frames = self._cpr.get(icao)
+        if frames is None:
+            frames = self._cpr[icao] = [None, None]
+        frames[odd] = (lat, lon, now)
+
+        other = frames[1 - odd]
+        if other is None or now - other[2] > CPR_PAIR_MAX_AGE:
+            return
+        even_frame, odd_frame = frames
+        position = cpr_global(even_frame, odd_frame, odd_is_newest=bool(odd))
+        if position:
+            self.table.set_position(icao, position[0], position[1], now)
+
+    def _prune_cpr(self, now: float):
+        """Drop CPR frames too old to pair, so aircraft that left are forgotten."""
+        cutoff = now - CPR_PAIR_MAX_AGE
+        stale = [
+            icao for icao, frames in self._cpr.items()
+            if all(frame is None or frame[2] < cutoff for frame in frames)
+        ]
+        for icao in stale:
+            del self._cpr[icao]
+        self._next_cpr_prune = now + CPR_PAIR_MAX_AGE
+
+    def _decode_velocity(self, icao: int, me: int):
+        """Decode airborne velocity (TC 19)."""
+        table = self.table
+        subtype = (me >> 48) & 0x7
+
+        if subtype in (1, 2):
+            v_ew = (me >> 32) & 0x3FF
+            v_ns = (me >> 21) & 0x3FF
+            if v_ew and v_ns:
+                scale = 4 if subtype == 2 else 1
+                vx = (v_ew - 1) * scale * (-1 if (me >> 42) & 1 else 1)
+                vy = (v_ns - 1) * scale * (-1 if (me >> 31) & 1 else 1)
+                table.set(icao, "gs", round(math.hypot(vx, vy), 1))
+                table.set(icao, "track", round(math.degrees(math.atan2(vx, vy)) % 360, 1))
+        elif subtype in (3, 4):
+            if (me >> 42) & 1:
+                table.set(icao, "mag_heading", round(((me >> 32) & 0x3FF) * 360 / 1024, 1))
+            airspeed = (me >> 21) & 0x3FF
+            if airspeed:
+                speed = (airspeed - 1) * (4 if subtype == 4 else 1)
+                table.set(icao, "tas" if (me >> 31) & 1 else "ias", speed)
+        else:
+            return
+
+        vr = (me >> 10) & 0x1FF
+        if vr:
+            rate = (vr - 1) * 64 * (-1 if (me >> 19) & 1 else 1)
+            table.set(icao, "baro_rate" if (me >> 20) & 1 else "geom_rate", rate)
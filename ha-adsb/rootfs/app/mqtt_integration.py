@@ -0,0 +1,368 @@
+"""MQTT Integration - Publishes ADS-B entities and aircraft over MQTT with Home Assistant discovery."""
+import asyncio
+import json
+import logging
+import ssl
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    from asyncio_mqtt import Client, MqttError, Will
+except ImportError:
+    Client = MqttError = Will = None
+
+from ha_integration import STATE_REFRESH_INTERVAL, HAIntegration
+
+_LOGGER = logging.getLogger(__name__)
+
+SUPERVISOR_MQTT_SERVICE = "http://supervisor/services/mqtt"
+TOPIC_PREFIX = "adsb"
+DISCOVERY_PREFIX = "homeassistant"
+CLIENT_ID = "ha_adsb"
+
+RECONNECT_DELAY = 5  # seconds
+RECONNECT_DELAY_MAX = 300  # seconds
+FLUSH_TIMEOUT = 5  # seconds to drain pending messages on shutdown
+PUBLISH_CONCURRENCY = 10  # in-flight publishes; the client warns above this
+
+# Entity attributes that describe the entity rather than its state; they
+# go into the discovery config instead of the attributes topic
+DISCOVERY_ATTRIBUTES = {
+    "friendly_name": "name",
+    "unit_of_measurement": "unit_of_measurement",
+    "icon": "icon",
+    "device_class": "device_class",
+}
+
+# Aircraft fields published on the aircraft topic; counters and ages that
+# change on every poll are left out so unchanged aircraft cost nothing
+AIRCRAFT_FIELDS = (
+    "flight", "r", "t", "dbFlags", "category", "squawk", "emergency",
+    "alt_baro", "alt_geom", "gs", "track", "baro_rate", "lat", "lon",
+)
+
+DEVICE = {
+    "identifiers": ["ha_adsb"],
+    "name": "ADS-B Dashboard",
+    "manufacturer": "ha-addons",
+    "model": "ADS-B Dashboard add-on",
+}
+
+
+async def supervisor_mqtt_service(supervisor_token: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the MQTT broker the Supervisor provides (e.g. the Mosquitto add-on).
+
+    Returns:
+        Broker settings (host, port, username, password, ssl), None if no
+        broker is available
+    """
+    headers = {"Authorization": f"Bearer {supervisor_token}"}
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                SUPERVISOR_MQTT_SERVICE, headers=headers, timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status != 200:
+                    _LOGGER.debug(f"No MQTT service from the Supervisor: {response.status}")
+                    return None
+                return (await response.json()).get("data")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        _LOGGER.warning(f"Failed to get the MQTT service from the Supervisor: {e}")
+        return None
+
+
+class MQTTPublisher:
+    """
+    Publishes over one persistent, self-reconnecting MQTT connection.
+
+    Messages are coalesced per topic: everything submitted while a batch is
+    in flight goes out as the next batch, and only the latest payload of a
+    topic is sent.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 1883,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        availability_topic: str = f"{TOPIC_PREFIX}/status",
+        client_id: str = CLIENT_ID,
+    ):
+        """Initialize publisher."""
+        self.host = host
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.use_tls = use_tls
+        self.availability_topic = availability_topic
+        self.client_id = client_id
+        self.connected = False
+        self.published = 0
+        self.batches = 0
+        # Called on every (re)connect, so retained state can be restored
+        self.on_connect: Optional[Callable[[], None]] = None
+        self._pending: Dict[str, Tuple[str, bool]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def available() -> bool:
+        """Check if the MQTT client library is installed."""
+        return Client is not None
+
+    def _start(self):
+        """Start the connection task inside the running loop."""
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, topic: str, payload: str, retain: bool = False):
+        """Queue a message, replacing any unsent payload for the topic."""
+        if self._task is None:
+            self._start()
+        self._pending[topic] = (payload, retain)
+        self._idle.clear()
+        self._wake.set()
+
+    def is_pending(self, topic: str) -> bool:
+        """Check if a message for the topic is still waiting to be sent."""
+        return topic in self._pending
+
+    async def flush(self):
+        """Wait until every queued message is handed to the client, or the broker is unreachable."""
+        if self._task is not None and self._pending and self.connected:
+            await self._idle.wait()
+
+    async def close(self):
+        """Mark the add-on offline, drain pending messages and disconnect."""
+        if self._task is None:
+            return
+        if self.connected:
+            self.submit(self.availability_topic, "offline", retain=True)
+        try:
+            await asyncio.wait_for(self.flush(), timeout=FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"Dropping {len(self._pending)} unsent MQTT messages")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        """Keep the connection up and send batches as they are queued."""
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async with Client(
+                    self.host,
+                    self.port,
+                    username=self.username,
+                    password=self.password,
+                    client_id=self.client_id,
+                    will=Will(self.availability_topic, "offline", retain=True),
+                    tls_context=ssl.create_default_context() if self.use_tls else None,
+                ) as client:
+                    _LOGGER.info(f"Connected to MQTT broker {self.host}:{self.port}")
+                    self.connected = True
+                    delay = RECONNECT_DELAY
+                    if self.on_connect:
+                        self.on_connect()
+                    self._pending[self.availability_topic] = ("online", True)
+                    await self._serve(client)
+            except MqttError as e:
+                _LOGGER.warning(
+                    f"MQTT connection to {self.host}:{self.port} failed: {e}, retrying in {delay}s"
+                )
+            except Exception as e:
+                # e.g. OSError or TLS errors while connecting; CancelledError is not an Exception
+                _LOGGER.error(f"MQTT publisher error: {e}, reconnecting in {delay}s")
+            self.connected = False
+            self._idle.set()  # nothing can be sent until reconnected
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    async def _serve(self, client: "Client"):
+        """Send batches until the connection drops, which only the message stream reports."""
+        tasks = [
+            asyncio.create_task(self._send(client)),
+            asyncio.create_task(self._watch(client)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    @staticmethod
+    async def _watch(client: "Client"):
+        """Wait for the connection to drop; nothing is subscribed, so no messages arrive."""
+        async with client.messages() as messages:
+            async for _ in messages:
+                pass
+
+    async def _send(self, client: "Client"):
+        """Send queued messages in batches until the connection fails."""
+        while True:
+            if not self._pending:
+                self._idle.set()
+                await self._wake.wait()
+            self._wake.clear()
+
+            batch, self._pending = self._pending, {}
+            messages = list(batch.items())
+            try:
+                for start in range(0, len(messages), PUBLISH_CONCURRENCY):
+                    await asyncio.gather(*(
+                        client.publish(topic, payload, retain=retain)
+                        for topic, (payload, retain) in messages[start:start + PUBLISH_CONCURRENCY]
+                    ))
+            except Exception:
+                # Put back what was not superseded, for the next connection
+                for topic, message in batch.items():
+                    self._pending.setdefault(topic, message)
+                raise
+            self.batches += 1
+            self.published += len(batch)
+
+
+class MQTTIntegration(HAIntegration):
+    """
+    HomeAssistant entities over MQTT discovery instead of the REST API.
+
+    Entities are the same as with HAIntegration. Each one gets a retained
+    discovery config, a state topic and an attributes topic, and a topic is
+    only published when its value changed. All aircraft of a poll go out
+    as one message on `<prefix>/aircraft` holding only the fields that
+    changed, with a full snapshot every refresh interval.
+    """
+
+    def __init__(
+        self,
+        publisher: MQTTPublisher,
+        topic_prefix: str = TOPIC_PREFIX,
+        discovery_prefix: str = DISCOVERY_PREFIX,
+        refresh_interval: int = STATE_REFRESH_INTERVAL,
+    ):
+        """Initialize MQTT integration."""
+        super().__init__(None, refresh_interval=refresh_interval, publisher=publisher)
+        self.publisher.on_connect = self._restore
+        self.topic_prefix = topic_prefix
+        self.discovery_prefix = discovery_prefix
+        # topic -> last published payload
+        self._retained: Dict[str, str] = {}
+        # hex -> published fields of each aircraft
+        self._aircraft: Dict[str, Dict[str, Any]] = {}
+        self._next_full_snapshot = 0.0
+
+    def _restore(self):
+        """Re-send retained topics after a (re)connect; the broker may have lost them."""
+        for topic, payload in self._retained.items():
+            self.publisher.submit(topic, payload, retain=True)
+        self._next_full_snapshot = 0.0
+
+    def _publish_retained(self, topic: str, payload: str) -> bool:
+        """Publish a retained topic if its payload changed."""
+        if self._retained.get(topic) == payload:
+            return False
+        self._retained[topic] = payload
+        self.publisher.submit(topic, payload, retain=True)
+        return True
+
+    def _discovery_config(self, entity_id: str, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the discovery config of an entity."""
+        domain, object_id = entity_id.split(".", 1)
+        base = f"{self.topic_prefix}/{object_id}"
+        config = {
+            "unique_id": f"ha_adsb_{object_id}",
+            "object_id": object_id,
+            "state_topic": f"{base}/state",
+            "json_attributes_topic": f"{base}/attributes",
+            "availability_topic": self.publisher.availability_topic,
+            "device": DEVICE,
+        }
+        for attribute, key in DISCOVERY_ATTRIBUTES.items():
+            if attribute in attributes:
+                config[key] = attributes[attribute]
+        if domain == "binary_sensor":
+            config["payload_on"] = "on"
+            config["payload_off"] = "off"
+        return config
+
+    async def _set_state(self, entity_id: str, state: str, attributes: Dict[str, Any]) -> bool:
+        """
+        Publish an entity's state and attributes, skipping unchanged topics.
+
+        The discovery config is sent the first time an entity is seen.
+
+        Returns:
+            True, publishing never blocks on the broker
+        """
+        domain, object_id = entity_id.split(".", 1)
+        base = f"{self.topic_prefix}/{object_id}"
+        config_topic = f"{self.discovery_prefix}/{domain}/ha_adsb/{object_id}/config"
+        if config_topic not in self._retained:
+            self._publish_retained(
+                config_topic, json.dumps(self._discovery_config(entity_id, attributes))
+            )
+
+        extra = {key: value for key, value in attributes.items() if key not in DISCOVERY_ATTRIBUTES}
+        changed = self._publish_retained(f"{base}/state", state)
+        changed |= self._publish_retained(
+            f"{base}/attributes", json.dumps(extra, sort_keys=True, default=str)
+        )
+        if not changed:
+            self.skipped_updates += 1
+        return True
+
+    async def update_aircraft_data(
+        self, aircraft_data: Optional[Dict], summary: Optional[Dict] = None
+    ):
+        """Update aircraft sensors and publish the aircraft that changed."""
+        await super().update_aircraft_data(aircraft_data, summary)
+        self._publish_aircraft(aircraft_data or {})
+
+    def _publish_aircraft(self, aircraft_data: Dict):
+        """Publish one message with the changed fields of every aircraft."""
+        topic = f"{self.topic_prefix}/aircraft"
+        now = time.monotonic()
+        # An unsent delta would be overwritten, so replace it with a full snapshot
+        full = now >= self._next_full_snapshot or self.publisher.is_pending(topic)
+        if full:
+            self._next_full_snapshot = now + self.refresh_interval
+
+        current = {}
+        changes = {}
+        for ac in aircraft_data.get("aircraft", ()):
+            hex_id = ac.get("hex")
+            if not hex_id:
+                continue
+            fields = {key: ac[key] for key in AIRCRAFT_FIELDS if key in ac}
+            current[hex_id] = fields
+            previous = self._aircraft.get(hex_id)
+            if full or previous is None:
+                changes[hex_id] = fields
+            else:
+                delta = {key: value for key, value in fields.items() if previous.get(key) != value}
+                if delta:
+                    changes[hex_id] = delta
+        removed = [hex_id for hex_id in self._aircraft if hex_id not in current]
+        self._aircraft = current
+
+        if changes or removed or full:
+            self.publisher.submit(
+                topic,
+                json.dumps({
+                    "now": aircraft_data.get("now"),
+                    "full": full,
+                    "aircraft": changes,
+                    "removed": removed,
+                }, separators=(",", ":")),
+            )
@@ -0,0 +1,257 @@
+"""Nginx Config - Renders the proxy configuration and reloads nginx on change."""
+import logging
+import os
+import signal
+from pathlib import Path
+from typing import Dict, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+NGINX_CONFIG = "/etc/nginx/nginx.conf"
+NGINX_PID_FILE = "/run/nginx/nginx.pid"
+# Created once the first config is in place; the proxy service waits for it
+NGINX_READY_FILE = "/run/nginx/config.ready"
+
+# Micro-cache for receiver data, so N dashboard viewers cost one upstream request
+PROXY_CACHE_DIR = "/var/lib/nginx/cache/adsb"
+DEFAULT_CACHE_SIZE = 10  # MB
+DEFAULT_CACHE_TTL = 1  # seconds, 0 disables the cache
+UPSTREAM_KEEPALIVE = 8  # idle connections kept open to the receiver
+
+# Serves the .br files written by the tar1090 updater, when installed
+BROTLI_STATIC_MODULE = "/usr/lib/nginx/modules/ngx_http_brotli_static_module.so"
+
+
+def render_config(
+    html_dir: str,
+    device: Optional[Dict] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    cache_ttl: int = DEFAULT_CACHE_TTL,
+    metrics_port: Optional[int] = None,
+) -> str:
+    """
+    Render the nginx configuration.
+
+    Args:
+        html_dir: tar1090 html directory to serve
+        device: Detected receiver to proxy /data/ to, if any
+        cache_size: Maximum size of the receiver data cache in MB
+        cache_ttl: Seconds aircraft.json/receiver.json are served from cache
+        metrics_port: Local port of the service's metrics endpoint, if enabled
+
+    Returns:
+        Complete nginx.conf contents
+    """
+    # Determine device proxy configuration
+    upstream_config = ""
+    proxy_config = ""
+    cache_path_config = ""
+    if device and device.get("transport", "http") == "http":
+        upstream_config = f"""
+    upstream adsb_receiver {{
+        server {device['host']}:{device['port']};
+        keepalive {UPSTREAM_KEEPALIVE};
+    }}
+"""
+
+        cache_config = ""
+        if cache_ttl > 0:
+            cache_path_config = (
+                f"    proxy_cache_path {PROXY_CACHE_DIR} levels=1:2 keys_zone=adsb_data:1m "
+                f"max_size={cache_size}m inactive=1m use_temp_path=off;\n"
+            )
+            cache_config = f"""
+            # Polled by every open dashboard, collapse them into one request
+            location ~ ^/data/(aircraft|receiver)\\.json$ {{
+                proxy_pass http://adsb_receiver;
+                proxy_cache adsb_data;
+                # tar1090 appends cache-busting query strings; leave them out of the key
+                proxy_cache_key $scheme$proxy_host$uri;
+                proxy_cache_valid 200 {cache_ttl}s;
+                proxy_cache_lock on;
+                proxy_cache_lock_timeout 5s;
+                proxy_cache_use_stale updating error timeout;
+                proxy_ignore_headers Cache-Control Expires Set-Cookie;
+                # add_header here replaces the inherited ones, so repeat them
+                add_header Cache-Control "no-cache";
+                add_header X-Cache-Status $upstream_cache_status;
+            }}
+"""
+
+        # ^~ keeps the generic .json location below from taking /data/ requests
+        proxy_config = f"""
+        # Proxy to ADS-B device
+        location ^~ /data/ {{
+            proxy_pass http://adsb_receiver;
+            proxy_http_version 1.1;
+            proxy_set_header Connection "";
+            proxy_set_header Host $host;
+            add_header Cache-Control "no-cache";
+{cache_config}        }}
+"""
+
+    metrics_config = ""
+    if metrics_port:
+        metrics_config = f"""
+        # Prometheus metrics of the ADS-B service
+        location = /metrics {{
+            proxy_pass http://127.0.0.1:{metrics_port};
+            access_log off;
+        }}
+"""
+
+    brotli = os.path.exists(BROTLI_STATIC_MODULE)
+    load_modules = f"load_module {BROTLI_STATIC_MODULE};\n" if brotli else ""
+    brotli_config = "    brotli_static on;\n" if brotli else ""
+
+    return f"""
+{load_modules}daemon off;
+error_log /var/log/nginx/error.log warn;
+pid {NGINX_PID_FILE};
+
+events {{
+    worker_connections 1024;
+}}
+
+http {{
+    include /etc/nginx/mime.types;
+    default_type application/octet-stream;
+
+    access_log /var/log/nginx/access.log;
+
+    sendfile on;
+    keepalive_timeout 65;
+    gzip on;
+    # Use the .gz/.br siblings written after each tar1090 update
+    gzip_static on;
+{brotli_config}
+    # Assets requested with a version (?v=...) never change under that URL
+    map $arg_v $static_cache_control {{
+        "" "public, max-age=3600";
+        default "public, max-age=31536000, immutable";
+    }}
+
+{cache_path_config}{upstream_config}
+    server {{
+        listen 8080;
+        server_name _;
+
+        root {html_dir};
+        index index.html;
+
+        # Serve tar1090 static files
+        location / {{
+            try_files $uri $uri/ /index.html;
+            add_header Cache-Control $static_cache_control;
+        }}
+
+        # Libraries with a version or hash in the file name
+        location ~ "[._-]([0-9]+\\.[0-9]+(\\.[0-9]+)?|[0-9a-f]{{8,}})(\\.min)?\\.(js|css)$" {{
+            add_header Cache-Control "public, max-age=31536000, immutable";
+        }}
+
+        # Disable caching for data files
+        location ~ \\.(json|geojson)$ {{
+            add_header Cache-Control "no-cache, no-store, must-revalidate";
+            add_header Pragma "no-cache";
+            add_header Expires 0;
+        }}
+{proxy_config}{metrics_config}
+        # Health check
+        location /health {{
+            access_log off;
+            return 200 "OK";
+            add_header Content-Type text/plain;
+        }}
+    }}
+}}
+"""
+
+
+class NginxConfig:
+    """
+    Keeps nginx.conf in sync with its inputs.
+
+    The file is only rewritten when the rendered config changes. Writes go
+    to a temporary file that is renamed over the old one, so nginx never
+    reads a half-written config, and a running nginx is reloaded with SIGHUP.
+    """
+
+    def __init__(
+        self,
+        path: str = NGINX_CONFIG,
+        pid_file: str = NGINX_PID_FILE,
+        ready_file: str = NGINX_READY_FILE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: int = DEFAULT_CACHE_TTL,
+        metrics_port: Optional[int] = None,
+    ):
+        """Initialize config manager."""
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.metrics_port = metrics_port
+        self.pid_file = Path(pid_file)
+        self.ready_file = Path(ready_file)
+        self._current: Optional[str] = None
+
+    def apply(self, html_dir: str, device: Optional[Dict] = None) -> bool:
+        """
+        Render the config and install it if it changed.
+
+        Args:
+            html_dir: tar1090 html directory to serve
+            device: Detected receiver to proxy /data/ to, if any
+
+        Returns:
+            True if a new config was written
+        """
+        config = render_config(
+            html_dir, device, self.cache_size, self.cache_ttl, self.metrics_port
+        )
+        if config == self._current:
+            return False
+
+        try:
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            tmp_path.write_text(config)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            _LOGGER.error(f"Failed to write nginx configuration: {e}")
+            return False
+
+        first = self._current is None
+        self._current = config
+        _LOGGER.info("Nginx configuration written")
+
+        if first:
+            self._mark_ready()
+        self.reload()
+        return True
+
+    def _mark_ready(self):
+        """Let the proxy service know a config is in place."""
+        try:
+            self.ready_file.parent.mkdir(parents=True, exist_ok=True)
+            self.ready_file.touch()
+        except OSError as e:
+            _LOGGER.error(f"Failed to signal nginx config readiness: {e}")
+
+    def reload(self) -> bool:
+        """Ask a running nginx to re-read its config."""
+        try:
+            pid = int(self.pid_file.read_text().strip())
+        except (OSError, ValueError):
+            # Not started yet, it will read the new file on startup
+            return False
+
+        try:
+            os.kill(pid, signal.SIGHUP)
+        except ProcessLookupError:
+            return False
+        except OSError as e:
+            _LOGGER.warning(f"Failed to reload nginx: {e}")
+            return False
+
+        _LOGGER.info("Nginx reloaded")
+        return True
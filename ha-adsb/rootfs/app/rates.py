@@ -0,0 +1,124 @@
+"""Rate Tracker - Turns cumulative receiver counters into per-second rates."""
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+RATE_WINDOWS = {"10s": 10, "1m": 60, "5m": 300}  # seconds
+MAX_SAMPLES = 1024
+
+
+class RateTracker:
+    """
+    Computes instantaneous and windowed rates of a cumulative counter.
+
+    Samples are kept in a ring buffer as (timestamp, running total). The
+    running total only ever increases: when the counter goes backwards
+    (receiver restart) the new value is counted from zero.
+    """
+
+    def __init__(self, max_age: float = max(RATE_WINDOWS.values()), max_samples: int = MAX_SAMPLES):
+        """Initialize tracker."""
+        self.max_age = max_age
+        self._samples: deque = deque(maxlen=max_samples)
+        self._last_counter: Optional[float] = None
+        self._total = 0.0
+        self.resets = 0
+
+    def add(self, timestamp: float, counter: float):
+        """Record a counter reading taken at timestamp (seconds)."""
+        if self._samples and timestamp <= self._samples[-1][0]:
+            return  # same snapshot polled twice
+
+        if self._last_counter is not None:
+            if counter >= self._last_counter:
+                self._total += counter - self._last_counter
+            else:
+                self.resets += 1
+                self._total += counter
+        self._last_counter = counter
+        self._samples.append((timestamp, self._total))
+
+        cutoff = timestamp - self.max_age
+        # Keep one sample at or before the cutoff to anchor the widest window
+        while len(self._samples) > 2 and self._samples[1][0] <= cutoff:
+            self._samples.popleft()
+
+    def rate(self, window: Optional[float] = None) -> float:
+        """
+        Get the counter rate per second.
+
+        Args:
+            window: Seconds to average over; None for the instantaneous
+                rate between the last two samples
+
+        Returns:
+            Rate per second, 0 if there are not enough samples
+        """
+        if len(self._samples) < 2:
+            return 0.0
+
+        end_time, end_total = self._samples[-1]
+        if window is None:
+            start_time, start_total = self._samples[-2]
+        else:
+            start_time, start_total = self._window_start(end_time - window)
+
+        elapsed = end_time - start_time
+        if elapsed <= 0:
+            return 0.0
+        return (end_total - start_total) / elapsed
+
+    def _window_start(self, cutoff: float) -> Tuple[float, float]:
+        """Get the newest sample at or before cutoff, or the oldest sample."""
+        start = self._samples[0]
+        for sample in self._samples:
+            if sample[0] > cutoff:
+                break
+            start = sample
+        return start
+
+    def rates(self) -> Dict[str, float]:
+        """Get the instantaneous rate and every configured window."""
+        result = {"instant": round(self.rate(), 1)}
+        for name, window in RATE_WINDOWS.items():
+            result[name] = round(self.rate(window), 1)
+        return result
+
+
+def summarize_stats(stats: Dict, period: str = "last1min") -> Optional[Dict]:
+    """
+    Extract signal and message quality metrics from a readsb/dump1090 stats.json.
+
+    Args:
+        stats: Parsed stats.json
+        period: Which statistics period to read
+
+    Returns:
+        Flat dict of metrics, None if the period is missing
+    """
+    block = stats.get(period)
+    if not isinstance(block, dict):
+        return None
+
+    local = block.get("local", {})
+    summary = {
+        "messages": block.get("messages"),
+        "signal": local.get("signal"),
+        "noise": local.get("noise"),
+        "peak_signal": local.get("peak_signal"),
+        "strong_signals": local.get("strong_signals"),
+        "bad": local.get("bad"),
+        "unknown_icao": local.get("unknown_icao"),
+    }
+
+    accepted = local.get("accepted")
+    modes = local.get("modes")
+    if isinstance(accepted, list) and modes:
+        # Share of detected Mode S preambles that decoded to a valid message
+        summary["accepted"] = sum(accepted)
+        summary["quality"] = round(100 * sum(accepted) / modes, 1)
+
+    duration = (block.get("end") or 0) - (block.get("start") or 0)
+    if summary["messages"] is not None and duration > 0:
+        summary["message_rate"] = round(summary["messages"] / duration, 1)
+
+    return {key: value for key, value in summary.items() if value is not None}
@@ -0,0 +1,173 @@
+"""Receiver - Polling state for one ADS-B receiver."""
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from aircraft_table import AircraftTable
+from feeds import AVRFeed, BeastFeed, SBSFeed, StreamFeed
+from metrics import DECODE_DURATION, FETCH_BYTES, FETCH_DURATION, FETCHES
+
+_LOGGER = logging.getLogger(__name__)
+
+# aircraft.json starts with its generation time; peek at it before decoding
+NOW_PATTERN = re.compile(rb'"now"\s*:\s*([0-9.]+)')
+NOW_PEEK_BYTES = 256
+
+# Raw output ports we can decode, in order of preference
+RAW_FEEDS = {
+    30005: BeastFeed,
+    30003: SBSFeed,
+    30002: AVRFeed,
+}
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def device_key(device: Dict) -> tuple:
+    """Identify a device by where and how its aircraft are read."""
+    return (device["host"], device["port"], device.get("endpoint"))
+
+
+class Receiver:
+    """
+    One receiver's aircraft source: an aircraft.json poll or a raw feed.
+
+    Keeps the conditional-fetch state for its endpoint and decodes into its
+    own AircraftTable, which may be shared when it is the only receiver.
+    """
+
+    def __init__(self, device: Dict, table: Optional[AircraftTable] = None):
+        """Initialize receiver."""
+        self.device = device
+        self.key = device_key(device)
+        self.name = f"{device['host']}:{device['port']}"
+        self.table = table if table is not None else AircraftTable()
+        self.online = False
+        self.feed: Optional[StreamFeed] = None
+
+        # Conditional fetch state for the aircraft.json poll
+        self._validators: Dict[str, str] = {}
+        self._last_raw_now: Optional[bytes] = None
+        self._last_data: Optional[Dict] = None
+        self.fetch_counts = {"decoded": 0, "not_modified": 0, "unchanged": 0}
+
+    async def fetch(self, session: aiohttp.ClientSession, timeout: aiohttp.ClientTimeout) -> Optional[Dict]:
+        """Get current aircraft data from this receiver."""
+        device = self.device
+        data = None
+        if device["transport"] == "http":
+            try:
+                url = f"http://{device['host']}:{device['port']}{device['endpoint']}"
+                data = await self._fetch_aircraft_json(session, url, timeout)
+            except Exception as e:
+                _LOGGER.error(f"Failed to get aircraft data from {self.name}: {e}")
+            if data is None:
+                FETCHES.inc(receiver=self.name, result="error")
+        elif device["transport"] == "tcp":
+            data = self._get_stream_data()
+
+        self.online = data is not None
+        return data
+
+    async def _fetch_aircraft_json(
+        self, session: aiohttp.ClientSession, url: str, timeout: aiohttp.ClientTimeout
+    ) -> Optional[Dict]:
+        """
+        Fetch aircraft.json, skipping work when it has not changed.
+
+        Sends the receiver's ETag/Last-Modified validators back so an
+        unchanged file costs a 304, and compares the leading "now" field
+        against the previous snapshot before decoding the body.
+        """
+        started = time.monotonic()
+        status, body = await self._get_body(session, url, timeout)
+        if status == 304 and self._last_data is None:
+            # Nothing cached to reuse (e.g. after a restart): ask again without validators
+            self._validators = {}
+            status, body = await self._get_body(session, url, timeout)
+        FETCH_DURATION.observe(time.monotonic() - started, receiver=self.name)
+        if status == 304 and self._last_data is not None:
+            self._count("not_modified")
+            return self._last_data
+        if status != 200:
+            return None
+        FETCH_BYTES.observe(len(body), receiver=self.name)
+
+        match = NOW_PATTERN.search(body, 0, NOW_PEEK_BYTES)
+        raw_now = match.group(1) if match else None
+        if raw_now is not None and raw_now == self._last_raw_now and self._last_data is not None:
+            self._count("unchanged")
+            return self._last_data
+
+        started = time.monotonic()
+        data = loads(body)
+        DECODE_DURATION.observe(time.monotonic() - started, receiver=self.name)
+        self._count("decoded")
+        self._last_raw_now = raw_now
+        self._last_data = data
+        self.table.ingest(data)
+        return data
+
+    async def _get_body(
+        self, session: aiohttp.ClientSession, url: str, timeout: aiohttp.ClientTimeout
+    ) -> Tuple[int, bytes]:
+        """GET aircraft.json with the stored validators, returning the status and body."""
+        validators = self._validators
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status != 200:
+                return response.status, b""
+            self._validators = {
+                key: response.headers[header]
+                for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                if header in response.headers
+            }
+            return response.status, await response.read()
+
+    def _count(self, result: str):
+        """Count a successful fetch by how much work it took."""
+        self.fetch_counts[result] += 1
+        FETCHES.inc(receiver=self.name, result=result)
+
+    def _get_stream_data(self) -> Optional[Dict]:
+        """Get aircraft data from the persistent raw feed, starting it if needed."""
+        if self.feed is None:
+            feed_class = RAW_FEEDS.get(self.device["port"])
+            if feed_class is None:
+                return None
+            self.feed = feed_class(self.device["host"], self.device["port"], self.table)
+        self.feed.start()
+
+        if not self.feed.connected:
+            return None
+        return self.feed.snapshot()
+
+    def streaming(self) -> bool:
+        """Check if a raw feed connection is currently up."""
+        return self.feed is not None and self.feed.connected
+
+    async def stop(self):
+        """Stop the raw feed reader, if any."""
+        if self.feed is not None:
+            await self.feed.stop()
+            self.feed = None
+        self.online = False
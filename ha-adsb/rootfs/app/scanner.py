@@ -1,14 +1,24 @@
 """ADS-B Network Scanner - Discovers ADS-B receivers on local network."""
 import asyncio
+import ipaddress
 import logging
 import socket
+import time
 import aiohttp
-from typing import Optional, Dict, List, Tuple
+from typing import Awaitable, Optional, Dict, Iterable, List, Tuple
+
+from aircraft_table import AIRCRAFT_TTL, AircraftTable
+from discovery import (
+    MIN_PREFIX, arp_hosts, iter_hosts, local_networks, mdns_hosts, parse_networks
+)
+from metrics import SWEEP_DURATION, SWEEP_HOSTS
+from receiver import RAW_FEEDS, Receiver, device_key, loads
 
 _LOGGER = logging.getLogger(__name__)
 
 # Common ADS-B ports and endpoints
 ADSB_PORTS = [30002, 30003, 30005, 30104, 8080, 8081, 80]
+ADSB_HTTP_PORTS = [8080, 8081, 80]
 ADSB_HTTP_PATHS = [
     "/data/aircraft.json",
     "/tar1090/data/aircraft.json",
@@ -16,129 +26,405 @@ ADSB_HTTP_PATHS = [
     "/dump1090/data/aircraft.json",
 ]
 
+# HTTP connection pool settings
+POOL_LIMIT = 64
+POOL_LIMIT_PER_HOST = 4
+KEEPALIVE_TIMEOUT = 30  # seconds
+DNS_CACHE_TTL = 300  # seconds
+
+# Sweep limits
+DEFAULT_SCAN_CONCURRENCY = 256  # simultaneous probes
+DEFAULT_PROBE_RATE = 1000  # probes per second
+CONNECT_TIMEOUT = 0.5  # seconds, LAN port probes during a sweep
+
 
 class ADSBScanner:
     """Scanner for ADS-B receivers on local network."""
 
-    def __init__(self, timeout: int = 2):
+    def __init__(
+        self,
+        timeout: int = 2,
+        concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+        probe_rate: int = DEFAULT_PROBE_RATE,
+        aircraft_ttl: int = AIRCRAFT_TTL,
+        networks: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+    ):
         """Initialize scanner."""
         self.timeout = timeout
-        self.detected_device: Optional[Dict] = None
+        self.concurrency = max(1, concurrency)
+        self.detected_devices: List[Dict] = []
+        self.last_scan_stats: Dict = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Aircraft from all receivers, deduplicated by ICAO address. With a
+        # single receiver this is that receiver's own table.
+        self.aircraft = AircraftTable(ttl=aircraft_ttl)
+        self.receivers: Dict[tuple, Receiver] = {}
+
+        # Networks to sweep; empty means the networks of our own interfaces
+        self.networks = parse_networks(networks or [], MIN_PREFIX)
+        self.exclude = parse_networks(exclude or [])
+
+        # Sweep throttling: a semaphore caps open sockets, a paced schedule
+        # caps how many new probes start per second.
+        self._probe_slots = asyncio.Semaphore(self.concurrency)
+        self._probe_interval = 1.0 / max(1, probe_rate)
+        self._next_probe_at = 0.0
+        self._probe_count = 0
+        self._host_phases: Dict[str, Dict[str, float]] = {}
+
+        # Probes only bound the socket phases so that waiting for a free
+        # pooled connection during a sweep is not counted as a miss.
+        self._probe_timeout = aiohttp.ClientTimeout(
+            sock_connect=timeout, sock_read=timeout
+        )
+        self._fetch_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    @property
+    def detected_device(self) -> Optional[Dict]:
+        """Get the primary receiver, the one the dashboard proxy points at."""
+        return self.detected_devices[0] if self.detected_devices else None
+
+    @detected_device.setter
+    def detected_device(self, device: Optional[Dict]):
+        """Use a single receiver."""
+        self.detected_devices = [device] if device else []
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session, pooled connections and raw feeds."""
+        for receiver in self.receivers.values():
+            await receiver.stop()
+        self.receivers = {}
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
-    async def scan_network(self, specific_host: Optional[str] = None) -> Optional[Dict]:
+    async def scan_network(self, specific_host: Optional[str] = None, limit: int = 1) -> List[Dict]:
         """
         Scan local network for ADS-B devices.
 
+        Hosts from the ARP table and from mDNS adverts are probed first;
+        the rest of the subnet is only swept if that does not find `limit`
+        receivers. Hosts are swept by a bounded pool of workers; the sweep
+        stops and cancels outstanding probes as soon as enough receivers
+        are confirmed.
+
         Args:
             specific_host: If provided, only scan this specific host
+            limit: Number of receivers to look for
 
         Returns:
-            Dict with device info if found, None otherwise
+            Device info of every receiver found, possibly empty
         """
+        started = time.monotonic()
+        self._probe_count = 0
+        self._host_phases = {}
+
+        seeded = 0
         if specific_host:
-            hosts = [specific_host]
+            results, hosts_scanned = await self._sweep([specific_host], limit)
+            scanned_hosts = {specific_host}
         else:
-            hosts = await self._get_local_subnet_hosts()
+            results, hosts_scanned, scanned_hosts = await self._sweep_seeds(limit)
+            seeded = hosts_scanned
+        enumerated = time.monotonic()
 
-        _LOGGER.info(f"Scanning {len(hosts)} hosts for ADS-B receivers...")
+        if len(results) < limit and not specific_host:
+            networks = self._target_networks()
+            _LOGGER.info(
+                f"Scanning {', '.join(map(str, networks)) or 'no networks'} for ADS-B receivers..."
+            )
+            # Hosts are generated as workers ask for them, never all at once
+            hosts = iter_hosts(networks, self.exclude, scanned_hosts)
+            more, swept = await self._sweep(hosts, limit - len(results))
+            results += more
+            hosts_scanned += swept
+        finished = time.monotonic()
 
-        tasks = [self._scan_host(host) for host in hosts]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.last_scan_stats = {
+            "hosts": hosts_scanned,
+            "seeded": seeded,
+            "probes": self._probe_count,
+            "seed_s": round(enumerated - started, 3),
+            "sweep_s": round(finished - enumerated, 3),
+            "total_s": round(finished - started, 3),
+        }
+        if results:
+            self.last_scan_stats.update(self._host_phases.get(results[0]["host"], {}))
+        _LOGGER.debug(f"Scan stats: {self.last_scan_stats}")
+        SWEEP_DURATION.observe(finished - started)
+        SWEEP_HOSTS.observe(hosts_scanned)
 
         for result in results:
-            if result and not isinstance(result, Exception):
-                self.detected_device = result
-                _LOGGER.info(f"Found ADS-B device: {result}")
-                return result
+            _LOGGER.info(f"Found ADS-B device: {result}")
+        log = _LOGGER.info if results else _LOGGER.warning
+        log(
+            f"Found {len(results)} ADS-B device(s) on network "
+            f"({hosts_scanned} hosts, {self._probe_count} probes, "
+            f"{finished - started:.2f}s)"
+        )
+        return results
 
-        _LOGGER.warning("No ADS-B devices found on network")
-        return None
+    async def _sweep_seeds(self, limit: int) -> Tuple[List[Dict], int, set]:
+        """
+        Probe hosts that are known to exist before sweeping blindly.
 
-    async def _get_local_subnet_hosts(self) -> List[str]:
-        """Get list of hosts in local subnet to scan."""
+        The ARP table is probed while the mDNS query is still collecting
+        answers; advertised hosts are probed afterwards if still needed.
+
+        Returns:
+            Receivers found, hosts probed, and the set of probed addresses
+        """
+        mdns = asyncio.create_task(mdns_hosts())
         try:
-            # Get local IP
+            hosts = [host for host in arp_hosts() if self._allowed(host)]
+            _LOGGER.debug(f"Probing {len(hosts)} ARP neighbours")
+            results, scanned = await self._sweep(hosts, limit)
+            probed = set(hosts)
+
+            if len(results) < limit:
+                advertised = [
+                    host for host in await mdns
+                    if host not in probed and self._allowed(host)
+                ]
+                _LOGGER.debug(f"Probing {len(advertised)} mDNS advertised hosts")
+                more, swept = await self._sweep(advertised, limit - len(results))
+                results += more
+                scanned += swept
+                probed.update(advertised)
+        finally:
+            await self._cancel_all([mdns])
+
+        return results, scanned, probed
+
+    async def _sweep(self, hosts: Iterable[str], limit: int = 1) -> Tuple[List[Dict], int]:
+        """Scan hosts with bounded concurrency until `limit` receivers are found."""
+        host_iter = iter(hosts)
+        found: List[Dict] = []
+        scanned = 0
+
+        async def worker():
+            nonlocal scanned
+            # All workers pull from one iterator, so at most `concurrency`
+            # hosts are in flight and nothing is materialised up front.
+            for host in host_iter:
+                if len(found) >= limit:
+                    return
+                scanned += 1
+                try:
+                    result = await self._scan_host(host)
+                except Exception as e:
+                    _LOGGER.debug(f"Error scanning {host}: {e}")
+                    continue
+                if result:
+                    found.append(result)
+
+        workers = {asyncio.create_task(worker()) for _ in range(self.concurrency)}
+        try:
+            while workers and len(found) < limit:
+                _, workers = await asyncio.wait(
+                    workers, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            await self._cancel_all(workers)
+
+        return found[:limit], scanned
+
+    def _target_networks(self) -> List[ipaddress.IPv4Network]:
+        """Get the networks to sweep: configured ones, else the local interfaces."""
+        if self.networks:
+            return self.networks
+
+        networks = local_networks()
+        if networks:
+            return networks
+
+        _LOGGER.debug("No interface networks found, guessing the /24 of the routed address")
+        try:
+            # No interface information, fall back to the /24 of the routed address
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.connect(("8.8.8.8", 80))
             local_ip = s.getsockname()[0]
             s.close()
-
-            # Generate subnet IPs (simple /24 subnet)
-            base_ip = ".".join(local_ip.split(".")[:-1])
-            hosts = [f"{base_ip}.{i}" for i in range(1, 255)]
-
-            _LOGGER.debug(f"Local IP: {local_ip}, scanning subnet {base_ip}.0/24")
-            return hosts
+            return [ipaddress.IPv4Network(f"{local_ip}/24", strict=False)]
         except Exception as e:
             _LOGGER.error(f"Failed to determine local subnet: {e}")
             return []
 
+    def _allowed(self, host: str) -> bool:
+        """Check a seeded host against the configured networks and exclusions."""
+        try:
+            address = ipaddress.IPv4Address(host)
+        except ValueError:
+            return False
+        if self.networks and not any(address in network for network in self.networks):
+            return False
+        return not any(address in network for network in self.exclude)
+
     async def _scan_host(self, host: str) -> Optional[Dict]:
         """Scan a single host for ADS-B services."""
-        for port in ADSB_PORTS:
-            # Try HTTP endpoints
-            if port in [8080, 8081, 80]:
-                device_info = await self._check_http_endpoint(host, port)
-                if device_info:
-                    return device_info
-
-            # Try TCP connection for raw data ports
-            else:
-                if await self._check_tcp_port(host, port):
-                    # If TCP port is open, try to verify it's ADS-B
-                    device_info = await self._identify_adsb_device(host, port)
-                    if device_info:
-                        return device_info
+        started = time.monotonic()
 
-        return None
+        # Phase 1: connect to every candidate port at once
+        checks = await asyncio.gather(
+            *(self._check_tcp_port(host, port) for port in ADSB_PORTS)
+        )
+        open_ports = [port for port, is_open in zip(ADSB_PORTS, checks) if is_open]
+        probed = time.monotonic()
+        if not open_ports:
+            return None
 
-    async def _check_tcp_port(self, host: str, port: int) -> bool:
-        """Check if TCP port is open."""
+        raw_ports = sorted(
+            (port for port in open_ports if port not in ADSB_HTTP_PORTS),
+            key=self._raw_port_preference
+        )
+        http_ports = [port for port in open_ports if port in ADSB_HTTP_PORTS]
+
+        # Phase 2: race every HTTP endpoint, first valid response wins
+        device_info = await self._first_result(
+            self._check_http_path(host, port, path)
+            for port in http_ports
+            for path in ADSB_HTTP_PATHS
+        )
+        identified = time.monotonic()
+
+        if device_info:
+            if raw_ports:
+                device_info["raw_port"] = raw_ports[0]
+        elif raw_ports:
+            # If no HTTP interface found, assume it's a raw feed
+            device_info = self._raw_device_info(host, raw_ports[0])
+        else:
+            return None
+
+        self._host_phases[host] = {
+            "port_probe_s": round(probed - started, 3),
+            "identify_s": round(identified - probed, 3),
+        }
+        return device_info
+
+    async def _first_result(self, coros: Iterable[Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+        """Run probes concurrently and return the first truthy result."""
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
         try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(host, port),
-                timeout=self.timeout
-            )
-            writer.close()
-            await writer.wait_closed()
-            return True
-        except (asyncio.TimeoutError, ConnectionRefusedError, OSError):
-            return False
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result:
+                    return result
+            return None
+        finally:
+            await self._cancel_all(tasks)
+
+    @staticmethod
+    async def _cancel_all(tasks: Iterable[asyncio.Future]):
+        """Cancel outstanding tasks and wait for them to unwind."""
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
 
-    async def _check_http_endpoint(self, host: str, port: int) -> Optional[Dict]:
-        """Check HTTP endpoints for ADS-B data."""
-        for path in ADSB_HTTP_PATHS:
+    async def _acquire_probe(self):
+        """Pace probes to the configured probes-per-second budget."""
+        self._probe_count += 1
+        now = time.monotonic()
+        slot = max(now, self._next_probe_at)
+        self._next_probe_at = slot + self._probe_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _check_tcp_port(
+        self, host: str, port: int, timeout: float = CONNECT_TIMEOUT
+    ) -> bool:
+        """Check if TCP port is open."""
+        async with self._probe_slots:
+            await self._acquire_probe()
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port),
+                    timeout=timeout
+                )
+                writer.close()
+                await writer.wait_closed()
+                return True
+            except (asyncio.TimeoutError, ConnectionRefusedError, OSError):
+                return False
+
+    async def _check_http_path(self, host: str, port: int, path: str) -> Optional[Dict]:
+        """Check a single HTTP path for ADS-B data."""
+        async with self._probe_slots:
+            await self._acquire_probe()
             try:
                 url = f"http://{host}:{port}{path}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            if "aircraft" in data or "now" in data:
-                                device_type = self._identify_device_type(path, data)
-                                return {
-                                    "host": host,
-                                    "port": port,
-                                    "type": device_type,
-                                    "endpoint": path,
-                                    "transport": "http"
-                                }
+                session = self._get_session()
+                async with session.get(url, timeout=self._probe_timeout) as response:
+                    if response.status == 200:
+                        data = loads(await response.read())
+                        if "aircraft" in data or "now" in data:
+                            device_type = self._identify_device_type(path, data)
+                            return {
+                                "host": host,
+                                "port": port,
+                                "type": device_type,
+                                "endpoint": path,
+                                "transport": "http"
+                            }
             except (asyncio.TimeoutError, aiohttp.ClientError, Exception):
-                continue
+                return None
 
         return None
 
-    async def _identify_adsb_device(self, host: str, port: int) -> Optional[Dict]:
-        """Identify ADS-B device by checking common HTTP ports."""
-        # If raw data port is open, check for web interface on port 8080
-        http_ports = [8080, 8081, 80]
-        for http_port in http_ports:
-            device_info = await self._check_http_endpoint(host, http_port)
-            if device_info:
-                device_info["raw_port"] = port
-                return device_info
-
-        # If no HTTP interface found, assume it's a raw feed
+    async def revalidate(self, device: Dict) -> Optional[Dict]:
+        """
+        Confirm a previously known device with a single probe.
+
+        Args:
+            device: Device info from an earlier scan or the device cache
+
+        Returns:
+            Refreshed device info if it still answers, None otherwise
+        """
+        receiver = self.receivers.get(device_key(device))
+        if receiver and receiver.streaming():
+            # A live stream connection is proof enough
+            device_info = dict(device)
+        elif device.get("transport") == "http" and device.get("endpoint"):
+            device_info = await self._check_http_path(
+                device["host"], device["port"], device["endpoint"]
+            )
+            if device_info and "raw_port" in device:
+                device_info["raw_port"] = device["raw_port"]
+        elif await self._check_tcp_port(
+            device["host"], device["port"], timeout=self.timeout
+        ):
+            device_info = dict(device)
+        else:
+            device_info = None
+
+        return device_info
+
+    @staticmethod
+    def _raw_port_preference(port: int) -> int:
+        """Sort key putting decodable raw ports first."""
+        feeds = list(RAW_FEEDS)
+        return feeds.index(port) if port in feeds else len(feeds)
+
+    def _raw_device_info(self, host: str, port: int) -> Dict:
+        """Build device info for a raw TCP feed."""
         return {
             "host": host,
             "port": port,
@@ -161,23 +447,90 @@ class ADSBScanner:
             return "readsb"
 
     async def get_aircraft_data(self) -> Optional[Dict]:
-        """Get current aircraft data from detected device."""
-        if not self.detected_device:
+        """
+        Get current aircraft data from the detected devices.
+
+        Receivers are polled concurrently. With more than one, their
+        aircraft are merged into `aircraft` and the merged table is returned
+        in the aircraft.json format.
+
+        Returns:
+            Aircraft data, None if no receiver answered
+        """
+        await self._sync_receivers()
+        receivers = list(self.receivers.values())
+        if not receivers:
             return None
 
-        device = self.detected_device
+        session = self._get_session()
+        if len(receivers) == 1:
+            return await receivers[0].fetch(session, self._fetch_timeout)
 
-        if device["transport"] == "http":
-            try:
-                url = f"http://{device['host']}:{device['port']}{device['endpoint']}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
-                        if response.status == 200:
-                            return await response.json()
-            except Exception as e:
-                _LOGGER.error(f"Failed to get aircraft data: {e}")
-                return None
+        results = await asyncio.gather(
+            *(receiver.fetch(session, self._fetch_timeout) for receiver in receivers)
+        )
+        if not any(result is not None for result in results):
+            return None
+
+        for receiver in receivers:
+            receiver.table.expire()
+        self.aircraft.merge([receiver.table for receiver in receivers])
+        return self.aircraft.snapshot()
 
+    async def _sync_receivers(self):
+        """Match the set of polled receivers to the detected devices."""
+        wanted = {device_key(device): device for device in self.detected_devices}
+        # A lone receiver writes straight into the combined table
+        single = len(wanted) == 1
+
+        for key, receiver in list(self.receivers.items()):
+            shared = receiver.table is self.aircraft
+            if key not in wanted or shared != single:
+                await receiver.stop()
+                del self.receivers[key]
+
+        for key, device in wanted.items():
+            receiver = self.receivers.get(key)
+            if receiver is None:
+                table = self.aircraft if single else AircraftTable(ttl=self.aircraft.ttl)
+                self.receivers[key] = Receiver(device, table)
+            else:
+                receiver.device = device
+
+    def receiver_summaries(self) -> Dict[str, Dict]:
+        """Get per-receiver status and aircraft counts."""
+        return {
+            receiver.name: {
+                "online": receiver.online,
+                "type": receiver.device.get("type", "unknown"),
+                **receiver.table.summary(),
+            }
+            for receiver in self.receivers.values()
+        }
+
+    async def get_receiver_stats(self) -> Optional[Dict]:
+        """Get stats.json from the detected device, if it serves one."""
+        return await self._fetch_sibling_json("stats.json")
+
+    async def get_receiver_info(self) -> Optional[Dict]:
+        """Get receiver.json (refresh interval, history, location) from the detected device."""
+        return await self._fetch_sibling_json("receiver.json")
+
+    async def _fetch_sibling_json(self, filename: str) -> Optional[Dict]:
+        """Fetch a JSON file served next to the detected aircraft endpoint."""
+        device = self.detected_device
+        if not device or device["transport"] != "http" or not device.get("endpoint"):
+            return None
+
+        endpoint = device["endpoint"].rsplit("/", 1)[0] + "/" + filename
+        try:
+            url = f"http://{device['host']}:{device['port']}{endpoint}"
+            session = self._get_session()
+            async with session.get(url, timeout=self._fetch_timeout) as response:
+                if response.status == 200:
+                    return loads(await response.read())
+        except Exception as e:
+            _LOGGER.debug(f"No {filename} available: {e}")
         return None
 
     def get_device_info(self) -> Optional[Dict]:
@@ -0,0 +1,73 @@
+"""Poll Scheduler - Adapts the aircraft polling interval to receiver and traffic."""
+import random
+from typing import Optional
+
+DEFAULT_POLL_INTERVAL = 5  # seconds, normal traffic
+DEFAULT_MIN_INTERVAL = 1  # seconds
+DEFAULT_MAX_INTERVAL = 60  # seconds
+
+# Position updates per poll above which traffic counts as busy
+BUSY_POSITION_UPDATES = 10
+
+
+class PollScheduler:
+    """
+    Picks the delay before the next aircraft poll.
+
+    - Busy sky: poll at the receiver's own refresh rate (receiver.json)
+    - Normal traffic: poll every DEFAULT_POLL_INTERVAL seconds
+    - Empty sky: double the interval each quiet poll
+    - Receiver down: jittered exponential backoff
+
+    Every result is clamped to [min_interval, max_interval].
+    """
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        """Initialize scheduler."""
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.interval = interval
+        self.refresh: Optional[float] = None
+        self.failures = 0
+        self.current = self._clamp(interval)
+
+    def _clamp(self, value: float) -> float:
+        """Limit a delay to the configured bounds."""
+        return min(self.max_interval, max(self.min_interval, value))
+
+    def set_refresh(self, refresh: Optional[float]):
+        """Set the receiver's own update interval in seconds, if known."""
+        self.refresh = refresh if refresh and refresh > 0 else None
+
+    def next_interval(self, ok: bool, aircraft: int = 0, position_updates: int = 0) -> float:
+        """
+        Get the delay before the next poll.
+
+        Args:
+            ok: Whether the last poll returned data
+            aircraft: Aircraft currently tracked
+            position_updates: Aircraft whose position changed since the last poll
+
+        Returns:
+            Seconds to wait
+        """
+        if not ok:
+            self.failures += 1
+            ceiling = self._clamp(self.interval * 2 ** min(self.failures, 16))
+            # Full jitter keeps several add-ons from retrying in lockstep
+            self.current = self._clamp(random.uniform(self.min_interval, ceiling))
+            return self.current
+
+        self.failures = 0
+        if aircraft == 0:
+            self.current = self._clamp(max(self.current, self.interval) * 2)
+        elif position_updates >= BUSY_POSITION_UPDATES:
+            self.current = self._clamp(self.refresh or self.min_interval)
+        else:
+            self.current = self._clamp(max(self.interval, self.refresh or 0))
+        return self.current
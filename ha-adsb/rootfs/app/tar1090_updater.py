@@ -1,77 +1,269 @@
 """tar1090 Updater - Downloads and updates tar1090 from GitHub."""
+import asyncio
+import gzip
 import logging
 import os
-import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 _LOGGER = logging.getLogger(__name__)
 
 TAR1090_REPO = "https://github.com/wiedehopf/tar1090.git"
 TAR1090_DIR = "/var/www/tar1090"
-TAR1090_HTML_DIR = "/var/www/tar1090/html"
+TAR1090_OWNER = "nginx"
+GIT_TIMEOUT = 120  # seconds
+KEEP_RELEASES = 2  # served release plus the previous one, for rollback
+
+# Static files served precompressed through gzip_static/brotli_static
+COMPRESSIBLE_EXTENSIONS = frozenset((
+    ".html", ".js", ".css", ".json", ".geojson", ".svg", ".txt", ".xml", ".map",
+))
+COMPRESS_MIN_SIZE = 1024  # bytes, smaller files are not worth it
+GZIP_MAGIC = b"\x1f\x8b"
 
 
 class Tar1090Updater:
-    """Manages tar1090 installation and updates."""
+    """
+    Manages tar1090 installation and updates.
+
+    Layout under install_dir:
+        repo/               shallow git checkout that updates are fetched into
+        releases/<commit>/  hardlinked snapshots of repo, without .git
+        current             symlink to the release nginx serves
 
-    def __init__(self, install_dir: str = TAR1090_DIR):
+    Updates run git as async subprocesses, are skipped when the remote HEAD
+    is already installed, and go live by atomically replacing `current`.
+    """
+
+    def __init__(self, install_dir: str = TAR1090_DIR, repo_url: str = TAR1090_REPO):
         """Initialize updater."""
         self.install_dir = Path(install_dir)
-        self.html_dir = self.install_dir / "html"
+        self.repo_url = repo_url
+        self.repo_dir = self.install_dir / "repo"
+        self.releases_dir = self.install_dir / "releases"
+        self.current = self.install_dir / "current"
+        self.html_dir = self.current / "html"
+
+    async def _git(self, *args: str, timeout: float = GIT_TIMEOUT) -> Tuple[int, str, str]:
+        """Run git without blocking the event loop."""
+        process = await asyncio.create_subprocess_exec(
+            "git", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode, stdout.decode().strip(), stderr.decode().strip()
+
+    async def remote_revision(self) -> Optional[str]:
+        """Get the commit the remote HEAD points to, without fetching anything."""
+        returncode, stdout, stderr = await self._git("ls-remote", self.repo_url, "HEAD", timeout=30)
+        if returncode != 0 or not stdout:
+            _LOGGER.warning(f"Could not query tar1090 remote: {stderr}")
+            return None
+        return stdout.split()[0]
+
+    def installed_revision(self) -> Optional[str]:
+        """Get the commit of the release currently served."""
+        try:
+            return os.readlink(self.current).rsplit("/", 1)[-1]
+        except OSError:
+            return None
 
     async def update(self) -> bool:
         """Download or update tar1090 from GitHub."""
         try:
-            _LOGGER.info("Updating tar1090 from GitHub...")
+            remote = await self.remote_revision()
+            installed = self.installed_revision()
+            if remote and remote == installed and self.is_installed():
+                _LOGGER.info(f"tar1090 is up to date ({installed[:7]})")
+                return True
 
-            # Create install directory if it doesn't exist
+            _LOGGER.info("Updating tar1090 from GitHub...")
             self.install_dir.mkdir(parents=True, exist_ok=True)
 
-            # Check if git repo already exists
-            if (self.install_dir / ".git").exists():
-                _LOGGER.info("Updating existing tar1090 installation...")
-                result = subprocess.run(
-                    ["git", "-C", str(self.install_dir), "pull"],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
+            previous = None
+            if (self.repo_dir / ".git").exists():
+                _, previous, _ = await self._git("-C", str(self.repo_dir), "rev-parse", "HEAD")
+                returncode, _, stderr = await self._git(
+                    "-C", str(self.repo_dir), "fetch", "--depth", "1", "origin", "HEAD"
                 )
+                if returncode == 0:
+                    returncode, _, stderr = await self._git(
+                        "-C", str(self.repo_dir), "reset", "--hard", "FETCH_HEAD"
+                    )
             else:
                 _LOGGER.info("Cloning tar1090 from GitHub...")
-                result = subprocess.run(
-                    ["git", "clone", "--depth", "1", TAR1090_REPO, str(self.install_dir)],
-                    capture_output=True,
-                    text=True,
-                    timeout=60
+                shutil.rmtree(self.repo_dir, ignore_errors=True)
+                returncode, _, stderr = await self._git(
+                    "clone", "--depth", "1", self.repo_url, str(self.repo_dir)
                 )
 
-            if result.returncode != 0:
-                _LOGGER.error(f"Git operation failed: {result.stderr}")
+            if returncode != 0:
+                _LOGGER.error(f"Git operation failed: {stderr}")
                 return False
 
-            _LOGGER.info("tar1090 updated successfully")
-
-            # Verify HTML directory exists
-            if not self.html_dir.exists():
-                _LOGGER.error(f"HTML directory not found: {self.html_dir}")
+            _, revision, _ = await self._git("-C", str(self.repo_dir), "rev-parse", "HEAD")
+            if not (self.repo_dir / "html").exists():
+                _LOGGER.error(f"HTML directory not found in tar1090 revision {revision[:7]}")
                 return False
 
-            # Set proper permissions
-            subprocess.run(
-                ["chown", "-R", "nginx:nginx", str(self.install_dir)],
-                timeout=10
-            )
+            changed = None
+            if previous and previous != revision:
+                changed = await self._changed_files(previous, revision)
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.precompress)
+            await loop.run_in_executor(None, self._set_owner, changed)
+            await loop.run_in_executor(None, self._activate, revision)
 
+            _LOGGER.info(f"tar1090 updated successfully ({revision[:7]})")
             return True
 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             _LOGGER.error("tar1090 update timed out")
             return False
         except Exception as e:
             _LOGGER.error(f"Failed to update tar1090: {e}")
             return False
 
+    async def _changed_files(self, old: str, new: str) -> Optional[List[Path]]:
+        """List files that differ between two commits, None if unknown."""
+        # The shallow checkout may not have the old commit any more
+        returncode, stdout, _ = await self._git(
+            "-C", str(self.repo_dir), "diff", "--name-only", old, new
+        )
+        if returncode != 0:
+            return None
+        return [self.repo_dir / name for name in stdout.splitlines()]
+
+    def _set_owner(self, changed: Optional[List[Path]]):
+        """Give nginx ownership of the checkout, or of just the files that changed."""
+        if changed is None:
+            paths = [self.repo_dir, *self.repo_dir.rglob("*")]
+        else:
+            paths = set()
+            for path in changed:
+                paths.update((path, path.with_name(path.name + ".gz"), path.with_name(path.name + ".br")))
+                # New files may live in new directories
+                for parent in path.parents:
+                    if parent == self.repo_dir:
+                        break
+                    paths.add(parent)
+
+        try:
+            for path in paths:
+                if os.path.lexists(path):
+                    shutil.chown(path, TAR1090_OWNER, TAR1090_OWNER)
+        except (OSError, LookupError) as e:
+            _LOGGER.warning(f"Could not set tar1090 file ownership: {e}")
+
+    def _activate(self, revision: str):
+        """Snapshot the checkout as a release and point `current` at it atomically."""
+        release = self.releases_dir / revision
+        if not release.exists():
+            self.releases_dir.mkdir(parents=True, exist_ok=True)
+            staging = self.releases_dir / f".{revision}.tmp"
+            shutil.rmtree(staging, ignore_errors=True)
+            # Hardlinks: git replaces changed files rather than editing them,
+            # so the snapshot stays intact when the checkout is updated
+            shutil.copytree(
+                self.repo_dir, staging,
+                copy_function=os.link, ignore=shutil.ignore_patterns(".git"),
+            )
+            os.replace(staging, release)
+
+        link = self.install_dir / ".current.tmp"
+        if os.path.lexists(link):
+            link.unlink()
+        link.symlink_to(release.relative_to(self.install_dir))
+        os.replace(link, self.current)
+
+        # Drop old releases, keeping the newest ones for rollback
+        releases = sorted(
+            (path for path in self.releases_dir.iterdir() if not path.name.startswith(".")),
+            key=lambda path: path.stat().st_mtime, reverse=True,
+        )
+        for path in releases[KEEP_RELEASES:]:
+            if path != release:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def precompress(self, workers: Optional[int] = None) -> int:
+        """
+        Write .gz (and .br when brotli is available) siblings of static files.
+
+        Files whose compressed copies are newer than the source are skipped,
+        so repeated runs only touch what an update changed.
+
+        Args:
+            workers: Compression threads, defaults to the number of CPUs
+
+        Returns:
+            Number of files compressed
+        """
+        html_dir = self.repo_dir / "html"
+        if not html_dir.exists():
+            return 0
+
+        files = [
+            path for path in html_dir.rglob("*")
+            if path.suffix in COMPRESSIBLE_EXTENSIONS and path.is_file()
+        ]
+        # zlib and brotli release the GIL, so threads compress in parallel
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            compressed = sum(pool.map(self._compress_file, files))
+
+        _LOGGER.info(f"Precompressed {compressed} of {len(files)} tar1090 static files")
+        return compressed
+
+    @staticmethod
+    def _compress_file(path: Path) -> bool:
+        """Compress one file if its compressed copies are missing or stale."""
+        try:
+            stat = path.stat()
+            if stat.st_size < COMPRESS_MIN_SIZE:
+                return False
+            with open(path, "rb") as f:
+                if f.read(2) == GZIP_MAGIC:
+                    # Already gzip, tar1090 ships its aircraft db compressed
+                    return False
+
+            mtime = stat.st_mtime
+            targets = [(path.with_name(path.name + ".gz"), "gzip")]
+            if brotli is not None:
+                targets.append((path.with_name(path.name + ".br"), "brotli"))
+            stale = [
+                (target, codec) for target, codec in targets
+                if not target.exists() or target.stat().st_mtime < mtime
+            ]
+            if not stale:
+                return False
+
+            data = path.read_bytes()
+            for target, codec in stale:
+                if codec == "gzip":
+                    packed = gzip.compress(data, compresslevel=9, mtime=0)
+                else:
+                    packed = brotli.compress(data, quality=11)
+                tmp_path = target.with_name(target.name + ".tmp")
+                tmp_path.write_bytes(packed)
+                os.replace(tmp_path, target)
+            return True
+        except OSError as e:
+            _LOGGER.warning(f"Failed to compress {path}: {e}")
+            return False
+
     def get_html_dir(self) -> str:
         """Get the path to tar1090 HTML directory."""
         return str(self.html_dir)